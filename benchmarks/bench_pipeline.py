@@ -0,0 +1,333 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, 'src'))
+
+from data_generator import generate_kyc_data_to_disk
+from data_processor import load_kyc_csv, clean_data, apply_rule_based_detection, add_id_verification_features
+from fraud_model import prepare_features, train_fraud_model
+from decision_engine import DecisionEngine
+from id_document_processor import IDDocumentProcessor
+from face_verifier import FaceVerifier
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+DEFAULT_HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'history.json')
+DEFAULT_THRESHOLD = 0.15  # allowed fractional slowdown / memory growth before failing
+BASELINE_RUNS = 5         # number of previous runs the baseline median is taken over
+MIN_BASELINE_RUNS = 3     # stages are only gated once this many comparable runs exist
+DEFAULT_REPEATS = 3       # times each stage is run; the fastest run is recorded
+MIN_GATED_SECONDS = 0.25  # stages faster than this are too noisy to gate on throughput
+NOISE_MADS = 3            # a stage's allowed slowdown is at least this many median absolute deviations
+
+DUMMY_ID_PATH = os.path.join(ROOT_DIR, 'data', 'dummy_images', 'dummy_id.jpg')
+DUMMY_LIVE_PHOTO_PATH = os.path.join(ROOT_DIR, 'data', 'dummy_images', 'dummy_live_photo.jpg')
+
+STUB_OCR_TEXT = (
+    "NATIONAL ID CARD\n"
+    "Name: JOHN DOE\n"
+    "DOB: 1990-01-01\n"
+    "Document ID: ABC123456789\n"
+    "Expiry Date: 2030-12-31\n"
+    "Gender: M\n"
+)
+
+
+class StubVisionClient:
+    """Stands in for vision.ImageAnnotatorClient so no network calls are made."""
+
+    def text_detection(self, image):
+        return SimpleNamespace(text_annotations=[SimpleNamespace(description=STUB_OCR_TEXT)])
+
+    def annotate_image(self, request):
+        return SimpleNamespace(face_annotations=[SimpleNamespace(detection_confidence=0.99)])
+
+
+def _current_rss_mb():
+    """Resident set size of this process in MB (falls back to the peak on non-Linux)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+class PeakRSSSampler:
+    """Samples RSS on a background thread and keeps the maximum seen."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, _current_rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak_mb = _current_rss_mb()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, _current_rss_mb())
+
+
+def _reference_seconds():
+    """
+    Times a fixed mix of interpreter and NumPy work.
+
+    Timed next to each stage, it measures how fast the machine is at that
+    moment, so throughput can be compared across runs on a shared host.
+    """
+    values = np.random.default_rng(0).random(200_000)
+    start = time.perf_counter()
+    total = 0
+    for i in range(200_000):
+        total += i
+    np.sort(values)
+    return time.perf_counter() - start
+
+
+def _time_stage(results, stage, rows, func, *args, repeats=DEFAULT_REPEATS, **kwargs):
+    """
+    Runs `func` `repeats` times and records its fastest run and median peak RSS.
+
+    DataFrame arguments are copied before each run, outside the timed region,
+    so stages that modify their input start from the same data every time.
+    The fastest run of a reference workload is recorded next to it (see
+    _reference_seconds).
+    """
+    timings, peaks, references = [], [], []
+    for _ in range(repeats):
+        references.append(_reference_seconds())
+        run_args = [arg.copy() if isinstance(arg, pd.DataFrame) else arg for arg in args]
+        with PeakRSSSampler() as sampler:
+            start = time.perf_counter()
+            value = func(*run_args, **kwargs)
+            timings.append(time.perf_counter() - start)
+        peaks.append(sampler.peak_mb)
+    elapsed = min(timings)
+    peak_mb = statistics.median(peaks)
+    results[stage] = {
+        "seconds": round(elapsed, 4),
+        "reference_seconds": round(min(references), 6),
+        "rows": rows,
+        "rows_per_sec": round(rows / elapsed, 1) if elapsed > 0 else None,
+        "peak_rss_mb": round(peak_mb, 1),
+    }
+    print(f"  {stage:<18} {elapsed:9.3f}s  {results[stage]['rows_per_sec'] or 0:>14,.0f} rows/s  "
+          f"{peak_mb:8.1f} MB")
+    return value
+
+
+def _run_verification(df):
+    """Mirror run_pipeline's verification step against a stubbed Vision client."""
+    client = StubVisionClient()
+    id_processor = IDDocumentProcessor(client=client)
+    face_verifier = FaceVerifier(client=client)
+    doc_result = id_processor.process_document(DUMMY_ID_PATH)
+    doc_face = face_verifier.detect_face(doc_result["document_image_path"])
+    live_face = face_verifier.detect_face(DUMMY_LIVE_PHOTO_PATH)
+    verification_results = {
+        "authenticity_score": doc_result["authenticity_score"],
+        "extracted_data": doc_result["extracted_data"],
+        "face_match_confidence": face_verifier.match_faces(doc_face, live_face),
+    }
+    return add_id_verification_features(df, verification_results)
+
+
+def benchmark_size(n_records, work_dir, seed=0, workers=None, max_train_rows=None, repeats=DEFAULT_REPEATS):
+    """
+    Times every stage of the pipeline for one dataset size.
+
+    Args:
+        n_records (int): Number of synthetic records.
+        work_dir (str): Scratch directory for generated and written CSV files.
+        seed (int): Seed for the data generator.
+        workers (int): Worker processes for data generation.
+        max_train_rows (int): Optional cap on the rows used for training.
+        repeats (int): Runs per stage; the fastest is recorded.
+
+    Returns:
+        dict: Per-stage timings keyed by stage name.
+    """
+    results = {}
+    chunk_dir = os.path.join(work_dir, f"raw_{n_records}")
+    paths = _time_stage(results, "generate", n_records, generate_kyc_data_to_disk,
+                        n_records, chunk_dir, n_workers=workers, seed=seed, repeats=repeats)
+    # Read the way the pipeline does, keeping identifiers (e.g. Mobile) as strings
+    df = _time_stage(results, "csv_read", n_records,
+                     lambda: pd.concat((load_kyc_csv(p) for p in paths), ignore_index=True), repeats=repeats)
+    df = _time_stage(results, "clean_data", len(df), clean_data, df, repeats=repeats)
+    df = _time_stage(results, "rule_detection", len(df), apply_rule_based_detection, df, repeats=repeats)
+    df = _time_stage(results, "verification", len(df), _run_verification, df, repeats=repeats)
+    _time_stage(results, "prepare_features", len(df), prepare_features, df, repeats=repeats)
+
+    train_df = df if not max_train_rows or len(df) <= max_train_rows \
+        else df.sample(n=max_train_rows, random_state=seed)
+    model, scaler = _time_stage(results, "train", len(train_df), train_fraud_model, train_df, repeats=repeats)
+    # Time the decision engine main.py runs, starting from a cold cache
+    final_df = _time_stage(results, "predict", len(df), lambda: DecisionEngine(model, scaler).decide(df),
+                           repeats=repeats)
+    _time_stage(results, "csv_write", len(final_df), final_df.to_csv,
+                os.path.join(work_dir, f"final_{n_records}.csv"), index=False, repeats=repeats)
+    shutil.rmtree(chunk_dir, ignore_errors=True)
+    return results
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def benchmark_environment(args):
+    """The host and settings a run's numbers depend on; runs are only compared when these match."""
+    return {
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "workers": args.workers,
+        "max_train_rows": args.max_train_rows,
+        "seed": args.seed,
+        "repeats": args.repeats,
+    }
+
+
+def _adjusted_throughput(stage_metrics):
+    """Rows processed per reference workload run: throughput adjusted for the machine's speed at the time."""
+    return stage_metrics["rows_per_sec"] * stage_metrics["reference_seconds"]
+
+
+def find_regressions(history, results, threshold, environment=None, min_seconds=MIN_GATED_SECONDS):
+    """
+    Compares a run against the median of the previous runs in the same environment.
+
+    Throughput is compared after adjusting for the reference workload timed
+    next to each stage, so a host that is busier than during earlier runs
+    isn't reported as a regression. A stage whose earlier runs vary more than
+    `threshold` is allowed NOISE_MADS median absolute deviations instead.
+    Stages are only gated once MIN_BASELINE_RUNS comparable runs exist.
+
+    Args:
+        history (list): Earlier runs, oldest first.
+        results (dict): {size: {stage: metrics}} for the current run.
+        threshold (float): Allowed fractional throughput drop / memory growth.
+        environment (dict): The current run's benchmark_environment; only
+            earlier runs recorded with the same environment are compared.
+        min_seconds (float): Throughput of stages faster than this isn't gated.
+
+    Returns:
+        list: Human readable regression messages (empty if none).
+    """
+    comparable = [run for run in history if run.get("environment") == environment]
+    regressions = []
+    for size, stages in results.items():
+        for stage, current in stages.items():
+            previous = [run["results"][size][stage] for run in comparable[-BASELINE_RUNS:]
+                        if stage in run["results"].get(size, {})]
+            if len(previous) < MIN_BASELINE_RUNS:
+                continue
+            adjusted = pd.Series([_adjusted_throughput(p) for p in previous])
+            baseline_tput = adjusted.median()
+            allowed = max(threshold, NOISE_MADS * (adjusted - baseline_tput).abs().median() / baseline_tput)
+            baseline_rss = pd.Series([p["peak_rss_mb"] for p in previous]).median()
+            gated = current["seconds"] >= min_seconds and current["rows_per_sec"]
+            if gated and _adjusted_throughput(current) < baseline_tput * (1 - allowed):
+                slowdown = 1 - _adjusted_throughput(current) / baseline_tput
+                regressions.append(f"{size} rows / {stage}: throughput {current['rows_per_sec']:,.0f} "
+                                   f"rows/s, {slowdown:.0%} below baseline after adjusting for machine speed")
+            if current["peak_rss_mb"] > baseline_rss * (1 + threshold):
+                regressions.append(f"{size} rows / {stage}: peak RSS {current['peak_rss_mb']:.1f} MB "
+                                   f"vs baseline {baseline_rss:.1f} MB")
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark each stage of the KYC pipeline.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma separated dataset sizes (default: %(default)s).")
+    parser.add_argument("--history", default=DEFAULT_HISTORY_PATH, help="JSON history file.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Fail if throughput drops / peak RSS grows by more than this fraction.")
+    parser.add_argument("--workers", type=int, default=None, help="Processes used for data generation.")
+    parser.add_argument("--max-train-rows", type=int, default=None,
+                        help="Train on a sample of at most this many rows.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS,
+                        help="Runs per stage; the fastest is recorded.")
+    parser.add_argument("--min-seconds", type=float, default=MIN_GATED_SECONDS,
+                        help="Don't gate the throughput of stages faster than this.")
+    parser.add_argument("--no-record", action="store_true", help="Do not append this run to the history.")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    results = {}
+    work_dir = tempfile.mkdtemp(prefix="kyc_bench_")
+    try:
+        for size in sizes:
+            print(f"Benchmarking {size:,} records...")
+            results[str(size)] = benchmark_size(size, work_dir, seed=args.seed, workers=args.workers,
+                                                max_train_rows=args.max_train_rows, repeats=args.repeats)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    history = load_history(args.history)
+    environment = benchmark_environment(args)
+    regressions = find_regressions(history, results, args.threshold, environment, args.min_seconds)
+
+    if not args.no_record:
+        history.append({
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "environment": environment,
+            "results": results,
+        })
+        with open(args.history, "w") as f:
+            json.dump(history, f, indent=2)
+
+    if regressions:
+        print("\nPerformance regressions detected:")
+        for message in regressions:
+            print(f"  - {message}")
+        return 1
+    print("\nNo regressions detected.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
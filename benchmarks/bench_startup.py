@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT_DIR, 'src')
+COMPILED_MODEL_PATH = os.path.join(ROOT_DIR, 'models', 'fraud_detection_model.npz')
+
+DEFAULT_REPEATS = 5
+DEFAULT_SCORE_BUDGET = 1.0  # seconds a scoring-only process may take to start and score one record
+
+# Modules that are slow to import and should only load when a stage needs them
+HEAVY_MODULES = ["pandas", "sklearn", "faker", "google.cloud.vision", "PIL", "pytesseract", "matplotlib", "joblib"]
+
+SAMPLE_RECORD = {"CustomerID": "bench", "TxnCount": 12, "TxnAmount": 15000.0,
+                 "PAN": "ABCDE1234F", "Email": "bench@example.com"}
+
+
+def _entries():
+    """Name -> (argv, stdin) for each process whose startup is measured."""
+    python = sys.executable
+    return {
+        "score_cli": ([python, os.path.join(SRC_DIR, 'score.py'), "--model", COMPILED_MODEL_PATH],
+                      json.dumps(SAMPLE_RECORD) + "\n"),
+        "main_help": ([python, os.path.join(ROOT_DIR, 'main.py'), "--help"], ""),
+        "import_data_generator": ([python, "-c", "import data_generator"], ""),
+        "import_fraud_model": ([python, "-c", "import fraud_model"], ""),
+        "import_verification_service": ([python, "-c", "import verification_service"], ""),
+        "import_decision_engine": ([python, "-c", "import decision_engine"], ""),
+    }
+
+
+def _run(argv, stdin, extra_args=()):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SRC_DIR, os.environ.get("PYTHONPATH")])))
+    start = time.perf_counter()
+    proc = subprocess.run([argv[0], *extra_args, *argv[1:]], input=stdin, capture_output=True, text=True,
+                          cwd=ROOT_DIR, env=env)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(argv)} failed:\n{proc.stderr}")
+    return elapsed, proc.stderr
+
+
+def heavy_imports(argv, stdin):
+    """The HEAVY_MODULES a process imports, from `python -X importtime`."""
+    _, stderr = _run(argv, stdin, extra_args=("-X", "importtime"))
+    imported = {line.rsplit("|", 1)[-1].strip() for line in stderr.splitlines() if line.startswith("import time:")}
+    return [module for module in HEAVY_MODULES if module in imported]
+
+
+def measure(argv, stdin, repeats=DEFAULT_REPEATS):
+    """
+    Times a fresh process `repeats` times.
+
+    Returns:
+        dict: median and min wall time in seconds, and the heavy modules imported.
+    """
+    _run(argv, stdin)  # warm the OS file cache and the .pyc files
+    timings = [_run(argv, stdin)[0] for _ in range(repeats)]
+    return {"median_s": statistics.median(timings), "min_s": min(timings),
+            "heavy_imports": heavy_imports(argv, stdin)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure process startup time of the KYC entry points.")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--score-budget", type=float, default=DEFAULT_SCORE_BUDGET,
+                        help="Fail if the scoring-only process takes longer than this many seconds.")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    args = parser.parse_args(argv)
+
+    entries = _entries()
+    if not os.path.exists(COMPILED_MODEL_PATH):
+        print(f"{COMPILED_MODEL_PATH} not found; run the pipeline to compile the model. Skipping score_cli.")
+        del entries["score_cli"]
+
+    results = {name: measure(command, stdin, args.repeats) for name, (command, stdin) in entries.items()}
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, result in results.items():
+            heavy = ", ".join(result["heavy_imports"]) or "-"
+            print(f"{name:<30} {result['median_s'] * 1000:8.0f} ms  (min {result['min_s'] * 1000:.0f} ms)  "
+                  f"heavy imports: {heavy}")
+
+    failures = []
+    score = results.get("score_cli")
+    if score is not None:
+        if score["median_s"] > args.score_budget:
+            failures.append(f"score_cli took {score['median_s']:.2f}s, budget is {args.score_budget:.2f}s")
+        if score["heavy_imports"]:
+            failures.append(f"score_cli imported {', '.join(score['heavy_imports'])}")
+    if failures:
+        print("\nStartup regressions detected:")
+        for message in failures:
+            print(f"  - {message}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,12 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
 import sys
-from PIL import Image
 
 # Add src directory to Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from id_document_processor import IDDocumentProcessor
-from face_verifier import FaceVerifier
+# pandas, the plotting libraries and the Vision client are imported in the
+# sections that use them, so the page starts rendering without waiting for them.
 
 # Define paths (relative to the dashboard.py script)
 DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
@@ -19,65 +15,54 @@ FINAL_PREDICTIONS_PATH = os.path.join(DATA_DIR, 'final_kyc_predictions.csv')
 st.set_page_config(layout="wide")
 st.title("Simplified KYC Fraud Detection Dashboard")
 
-@st.cache_data
-def load_data(path):
+@st.cache_data(show_spinner="Aggregating predictions...")
+def load_aggregates(path, version):
     """
-    Loads data from the specified CSV path.
+    Loads the precomputed chart aggregates for one version of the predictions file.
+    `version` is only part of the cache key, so a new predictions file invalidates the cache.
     """
-    if os.path.exists(path):
-        return pd.read_csv(path)
-    return None
+    return dashboard_data.load_or_compute_aggregates(path)
+
+@st.cache_resource
+def get_verification_service():
+    """
+    One VerificationService (and Vision client) shared by every session and rerun.
+    """
+    from verification_service import VerificationService
+
+    return VerificationService()
+
+@st.cache_data(max_entries=1)
+def load_file_bytes(path, version):
+    """
+    Reads the predictions file for the download button once per version.
+    """
+    with open(path, "rb") as f:
+        return f.read()
 
 # --- ID Verification and Facial Matching Section ---
 st.header("Identity Document and Facial Matching")
 st.write("Upload an identity document image and a live photo/selfie to perform OCR and facial matching.")
 
-id_processor = IDDocumentProcessor()
-face_verifier = FaceVerifier()
-
 # File uploaders
 document_image_file = st.file_uploader("Upload Identity Document Image (e.g., Passport, ID Card)", type=["jpg", "jpeg", "png"])
 live_photo_file = st.file_uploader("Upload Live Photo / Selfie", type=["jpg", "jpeg", "png"])
 
-verification_results = {}
-
 if document_image_file and live_photo_file:
     st.subheader("Processing Identity Verification...")
 
-    # Save uploaded files temporarily to process them
-    doc_img_path = os.path.join(DATA_DIR, "uploaded_doc_image.jpg")
-    live_photo_path = os.path.join(DATA_DIR, "uploaded_live_photo.jpg")
-
-    with open(doc_img_path, "wb") as f:
-        f.write(document_image_file.getbuffer())
-    with open(live_photo_path, "wb") as f:
-        f.write(live_photo_file.getbuffer())
-
     try:
         # Display uploaded images
         st.image(document_image_file, caption='Uploaded ID Document', width=300)
         st.image(live_photo_file, caption='Uploaded Live Photo', width=300)
 
-        # 1. Process Document (OCR and Authenticity)
-        doc_result = id_processor.process_document(doc_img_path)
-        verification_results["authenticity_score"] = doc_result["authenticity_score"]
-        verification_results["extracted_data"] = doc_result["extracted_data"]
-
-        # Extract face from document image for matching
-        doc_face_annotation = face_verifier.detect_face(doc_img_path)
-
-        # 2. Process Live Photo
-        live_photo_face_annotation = face_verifier.detect_face(live_photo_path)
-
-        # 3. Face Matching
-        face_match_confidence = 0.0
-        if doc_face_annotation is not None and live_photo_face_annotation is not None:
-            face_match_confidence = face_verifier.match_faces(doc_face_annotation, live_photo_face_annotation)
-        else:
+        verification_service = get_verification_service()
+        # Document OCR and both face detections run concurrently on the
+        # in-memory uploads; identical uploads are served from the cache.
+        verification_results = verification_service.verify(document_image_file.getvalue(), live_photo_file.getvalue())
+        if not verification_results["faces_detected"]:
             st.warning("Could not detect faces in one or both images for matching.")
 
-        verification_results["face_match_confidence"] = face_match_confidence
-
         st.success("Identity Verification Completed!")
         st.write(f"**Document Authenticity Score:** {verification_results['authenticity_score']:.2f}")
         st.write(f"**Face Match Confidence:** {verification_results['face_match_confidence']:.2f}")
@@ -95,62 +80,83 @@ if document_image_file and live_photo_file:
     except Exception as e:
         st.error(f"Error during identity verification: {e}")
 
-    # Clean up temporary files
-    if os.path.exists(doc_img_path): os.remove(doc_img_path)
-    if os.path.exists(live_photo_path): os.remove(live_photo_path)
-
 # --- Existing Dashboard Content ---
 st.header("KYC Fraud Prediction Analytics")
 
-df = load_data(FINAL_PREDICTIONS_PATH)
+import dashboard_data
+
+version = dashboard_data.predictions_version(FINAL_PREDICTIONS_PATH)
+aggregates = load_aggregates(FINAL_PREDICTIONS_PATH, version) if version else None
+
+if aggregates is not None:
+    import numpy as np
+    import pandas as pd
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    st.success(f"Data loaded successfully from {FINAL_PREDICTIONS_PATH} ({aggregates['row_count']:,} records)")
+    sample = pd.DataFrame(aggregates["sample"])
 
-if df is not None:
-    st.success(f"Data loaded successfully from {FINAL_PREDICTIONS_PATH}")
-    
     st.write("## Data Preview")
-    st.dataframe(df.head())
+    page_size = st.selectbox("Rows per page", [25, 50, 100, 500], index=1)
+    page_count = max(1, -(-aggregates["row_count"] // page_size))
+    page = st.number_input(f"Page (1-{page_count})", min_value=1, max_value=page_count, value=1)
+    st.dataframe(dashboard_data.read_page(FINAL_PREDICTIONS_PATH, page - 1, page_size,
+                                           aggregates["page_index"]))
 
     st.write("## Fraud Prediction Distribution")
     col1, col2 = st.columns(2)
     with col1:
         st.subheader("Rule-Based Flag Distribution")
+        counts = aggregates["rule_flag_counts"]
         fig, ax = plt.subplots()
-        sns.countplot(x='RuleFlag', data=df, ax=ax, palette='viridis')
+        ax.bar(list(counts), list(counts.values()), color=sns.color_palette('viridis', len(counts)))
+        ax.set_xlabel('RuleFlag')
+        ax.set_ylabel('count')
         st.pyplot(fig)
     with col2:
         st.subheader("ML Prediction Distribution")
+        counts = aggregates["ml_prediction_counts"]
         fig, ax = plt.subplots()
-        sns.countplot(x='ML_Prediction', data=df, ax=ax, palette='magma')
+        ax.bar(list(counts), list(counts.values()), color=sns.color_palette('magma', len(counts)))
+        ax.set_xlabel('ML_Prediction')
+        ax.set_ylabel('count')
         st.pyplot(fig)
 
     st.write("## Fraud Probability Distribution (ML Model)")
+    histogram = aggregates["probability_histogram"]
     fig, ax = plt.subplots()
-    sns.histplot(df['Fraud_Probability'], kde=True, ax=ax, bins=30)
+    ax.stairs(histogram["counts"], histogram["edges"], fill=True, alpha=0.7)
     ax.set_title('Distribution of ML Fraud Probabilities')
     ax.set_xlabel('Fraud Probability')
     ax.set_ylabel('Number of Records')
     st.pyplot(fig)
 
-    st.write("## Transaction Amount vs. Fraud Probability")
-    fig, ax = plt.subplots()
-    sns.scatterplot(x='TxnAmount', y='Fraud_Probability', hue='ML_Prediction', data=df, ax=ax, alpha=0.6)
-    ax.set_title('Transaction Amount vs. Fraud Probability')
-    ax.set_xlabel('Transaction Amount')
-    ax.set_ylabel('Fraud Probability')
-    st.pyplot(fig)
-
-    st.write("## Transaction Count vs. Fraud Probability")
-    fig, ax = plt.subplots()
-    sns.scatterplot(x='TxnCount', y='Fraud_Probability', hue='ML_Prediction', data=df, ax=ax, alpha=0.6)
-    ax.set_title('Transaction Count vs. Fraud Probability')
-    ax.set_xlabel('Transaction Count')
-    ax.set_ylabel('Fraud Probability')
-    st.pyplot(fig)
+    for column, label in [("TxnAmount", "Transaction Amount"), ("TxnCount", "Transaction Count")]:
+        st.write(f"## {label} vs. Fraud Probability")
+        density = aggregates["density"][column]
+        col1, col2 = st.columns(2)
+        with col1:
+            fig, ax = plt.subplots()
+            counts = np.ma.masked_equal(np.array(density["counts"]).T, 0)
+            mesh = ax.pcolormesh(density["x_edges"], density["y_edges"], counts, cmap='viridis')
+            fig.colorbar(mesh, ax=ax, label='Number of Records')
+            ax.set_title(f'{label} vs. Fraud Probability (all model-scored records)')
+            ax.set_xlabel(label)
+            ax.set_ylabel('Fraud Probability')
+            st.pyplot(fig)
+        with col2:
+            fig, ax = plt.subplots()
+            sns.scatterplot(x=column, y='Fraud_Probability', hue='ML_Prediction', data=sample, ax=ax, alpha=0.6)
+            ax.set_title(f'{label} vs. Fraud Probability (sample of {len(sample):,})')
+            ax.set_xlabel(label)
+            ax.set_ylabel('Fraud Probability')
+            st.pyplot(fig)
 
     st.write("## Download Processed Data")
     st.download_button(
         label="Download final_kyc_predictions.csv",
-        data=df.to_csv(index=False).encode('utf-8'),
+        data=load_file_bytes(FINAL_PREDICTIONS_PATH, version),
         file_name='final_kyc_predictions.csv',
         mime='text/csv',
     )
@@ -1,129 +1,249 @@
-import pandas as pd
+import argparse
+import json
 import os
 import sys
 import logging
-import random
 
 # Add src directory to Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from data_generator import generate_synthetic_kyc_data
-from data_processor import process_kyc_data, add_id_verification_features
-from fraud_model import train_fraud_model, predict_fraud, load_model
-from id_document_processor import IDDocumentProcessor
-from face_verifier import FaceVerifier
+# Stage dependencies (pandas, scikit-learn, Faker, Google Vision) are imported
+# inside the stage functions, so only the stages that run pay their import cost.
+from pipeline_runner import Stage, PipelineRunner
+import metrics
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+SRC_DIR = os.path.join(os.path.dirname(__file__), 'src')
 DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
 MODELS_DIR = os.path.join(os.path.dirname(__file__), 'models')
 
 RAW_DATA_PATH = os.path.join(DATA_DIR, 'raw_kyc_data.csv')
+RULE_FLAGGED_DATA_PATH = os.path.join(DATA_DIR, 'rule_flagged_kyc_data.csv')
+VERIFICATION_RESULTS_PATH = os.path.join(DATA_DIR, 'verification_results.json')
 PROCESSED_DATA_PATH = os.path.join(DATA_DIR, 'processed_kyc_data.csv')
 FINAL_PREDICTIONS_PATH = os.path.join(DATA_DIR, 'final_kyc_predictions.csv')
 MODEL_PATH = os.path.join(MODELS_DIR, 'fraud_detection_model.pkl')
+MODEL_REGISTRY_DIR = os.path.join(MODELS_DIR, 'registry')
+MODEL_ALIASES_PATH = os.path.join(MODEL_REGISTRY_DIR, 'aliases.json')
+LATEST_MODEL_PATH = os.path.join(MODEL_REGISTRY_DIR, 'latest.json')
+METRICS_PATH = os.path.join(DATA_DIR, 'pipeline_metrics.prom')
+PIPELINE_STATE_PATH = os.path.join(DATA_DIR, '.pipeline_state.json')
+
+# In the main pipeline, we still simulate the *paths* to images
+# but the underlying IDDocumentProcessor and FaceVerifier will now
+# attempt to perform real (simplified) OCR and face detection/matching
+DUMMY_ID_PATH = "/home/ubuntu/upload/id.jpg"
+DUMMY_LIVE_PHOTO_PATH = "/home/ubuntu/upload/avinash.jpg"
+
+# Share of model-tier records also scored by shadow (candidate) models
+SHADOW_TRAFFIC_FRACTION = 0.1
+
+def _sources(*modules):
+    """Paths of the src/ modules a stage runs, so editing them re-runs the stage."""
+    return [os.path.join(SRC_DIR, f"{module}.py") for module in modules]
+
+def generate_stage(num_records):
+    """Step 1: Generate synthetic data."""
+    from data_generator import generate_synthetic_kyc_data
+
+    logging.info(f"Generating {num_records} synthetic KYC records...")
+    raw_df = generate_synthetic_kyc_data(n_records=num_records)
+    raw_df.to_csv(RAW_DATA_PATH, index=False)
+    logging.info(f"Synthetic data saved to {RAW_DATA_PATH}")
+    return len(raw_df)
+
+def process_stage():
+    """Step 2: Process data (clean and apply rule-based detection)."""
+    from data_processor import process_kyc_data, load_kyc_csv
+    from dedup import duplicate_clusters
+
+    logging.info("Processing KYC data (cleaning and rule-based detection)...")
+    raw_df = load_kyc_csv(RAW_DATA_PATH)
+    clusters = duplicate_clusters(raw_df)
+    if len(clusters):
+        logging.info(f"{len(clusters)} identities are shared by several CustomerIDs "
+                     f"(largest cluster: {clusters['Size'].iloc[0]} records)")
+    processed_df = process_kyc_data(raw_df)
+    processed_df.to_csv(RULE_FLAGGED_DATA_PATH, index=False)
+    logging.info(f"Rule-flagged data saved to {RULE_FLAGGED_DATA_PATH}")
+    return len(processed_df)
+
+def verify_stage(id_path, live_photo_path):
+    """
+    Step 3: Simulate ID document and facial verification.
+
+    Raises if OCR fails or no face is found, so the failure isn't stored as
+    a result and the stage runs again next time.
+    """
+    from id_document_processor import IDDocumentProcessor, is_ocr_error
+    from face_verifier import FaceVerifier
+
+    logging.info("Simulating ID document and facial verification...")
+    id_processor = IDDocumentProcessor()
+    face_verifier = FaceVerifier()
+
+    # For simplicity, we simulate verification for a single applicant and
+    # apply the result to every record. In a real system, this would happen
+    # for each new application.
+    doc_verification_result = id_processor.process_document(id_path)
+    if is_ocr_error(doc_verification_result["extracted_data"]):
+        raise RuntimeError(f"OCR failed for the ID document {id_path}")
+    extracted_doc_face_annotation = face_verifier.detect_face(doc_verification_result["document_image_path"])
+    if extracted_doc_face_annotation is None:
+        raise RuntimeError(f"No face found in the ID document {id_path}")
+
+    # Process live photo using real face detection
+    live_photo_face_annotation = face_verifier.detect_face(live_photo_path)
+    if live_photo_face_annotation is None:
+        raise RuntimeError(f"No face found in the live photo {live_photo_path}")
+
+    # Face matching
+    face_match_confidence = face_verifier.match_faces(extracted_doc_face_annotation, live_photo_face_annotation)
+
+    verification_results = {
+        "authenticity_score": doc_verification_result["authenticity_score"],
+        "extracted_data": doc_verification_result["extracted_data"],
+        "face_match_confidence": face_match_confidence
+    }
+    with open(VERIFICATION_RESULTS_PATH, "w") as f:
+        json.dump(verification_results, f, indent=2)
+    logging.info(f"Verification results saved to {VERIFICATION_RESULTS_PATH}")
+
+def features_stage():
+    """Step 3b: Add the verification features to the rule-flagged data."""
+    from data_processor import add_id_verification_features, load_kyc_csv
+
+    with open(VERIFICATION_RESULTS_PATH) as f:
+        verification_results = json.load(f)
+    # For simplicity, applying to all rows with the same simulated result
+    # In a real system, each row would have its own verification result
+    processed_df = add_id_verification_features(load_kyc_csv(RULE_FLAGGED_DATA_PATH, compact=True), verification_results)
+    processed_df.to_csv(PROCESSED_DATA_PATH, index=False)
+    logging.info(f"Processed data saved to {PROCESSED_DATA_PATH}")
+    return len(processed_df)
+
+def train_stage():
+    """
+    Step 4: Train the fraud detection model and register it as a new version.
+
+    The first version becomes the production model. Later versions are scored
+    in shadow mode until promoted with `python src/model_registry.py promote`.
+    The registered version's metadata is written to LATEST_MODEL_PATH, which
+    promote and shadow don't touch, so promoting doesn't make training re-run.
+    """
+    from data_processor import load_kyc_csv
+    from fraud_model import train_fraud_model
+    from model_registry import ModelRegistry
+
+    logging.info("Training fraud detection model...")
+    processed_df = load_kyc_csv(PROCESSED_DATA_PATH, compact=True)
+    registry = ModelRegistry(MODEL_REGISTRY_DIR, production_path=MODEL_PATH)
+    train_fraud_model(processed_df, registry=registry)
+    aliases = registry.aliases()
+    version = aliases["latest"]
+    if aliases["production"] is None:
+        registry.promote(version)
+    elif version != aliases["production"]:
+        registry.set_shadow([version])
+        logging.info(f"Model version {version} will be scored in shadow mode next to "
+                     f"production version {aliases['production']}")
+    with open(LATEST_MODEL_PATH, "w") as f:
+        json.dump(registry.metadata(version), f, indent=2)
+    return len(processed_df)
+
+def predict_stage():
+    """Step 5: Predict fraud (hard rules and cheap rules first, the model only for the rest)."""
+    from data_processor import load_kyc_csv
+    from decision_engine import DecisionEngine
+    from model_registry import ModelRegistry, ShadowScorer
+
+    logging.info("Making fraud predictions...")
+    registry = ModelRegistry(MODEL_REGISTRY_DIR, production_path=MODEL_PATH)
+    trained_model, scaler = registry.load("production")
+    shadow = ShadowScorer.from_registry(registry, fraction=SHADOW_TRAFFIC_FRACTION)
+    engine = DecisionEngine(trained_model, scaler, shadow=shadow, model_version=registry.resolve("production"))
+    final_df = engine.decide(load_kyc_csv(PROCESSED_DATA_PATH, compact=True))
+    logging.info(f"Decision engine: {engine.summary()}")
+    final_df.to_csv(FINAL_PREDICTIONS_PATH, index=False)
+    logging.info(f"Final predictions saved to {FINAL_PREDICTIONS_PATH}")
+    return len(final_df)
+
+def build_pipeline_stages(num_records):
+    """
+    Declares the pipeline stages and the files they read and write.
 
-def run_pipeline(num_records=1000):
+    Verification only depends on the uploaded images, so it runs concurrently
+    with rule-based processing. Each stage lists the src/ modules it runs, so
+    a code change re-runs the stages it affects. Predict also reads the
+    registry aliases, so promoting a model re-runs prediction only.
+    """
+    return [
+        Stage("generate", generate_stage, outputs=[RAW_DATA_PATH],
+              params={"num_records": num_records}, code=_sources("data_generator")),
+        Stage("process", process_stage, inputs=[RAW_DATA_PATH], outputs=[RULE_FLAGGED_DATA_PATH],
+              code=_sources("data_processor", "schema", "dedup")),
+        Stage("verify", verify_stage, inputs=[DUMMY_ID_PATH, DUMMY_LIVE_PHOTO_PATH],
+              outputs=[VERIFICATION_RESULTS_PATH],
+              params={"id_path": DUMMY_ID_PATH, "live_photo_path": DUMMY_LIVE_PHOTO_PATH},
+              code=_sources("id_document_processor", "face_verifier")),
+        Stage("features", features_stage, inputs=[RULE_FLAGGED_DATA_PATH, VERIFICATION_RESULTS_PATH],
+              outputs=[PROCESSED_DATA_PATH], code=_sources("data_processor", "schema")),
+        Stage("train", train_stage, inputs=[PROCESSED_DATA_PATH], outputs=[LATEST_MODEL_PATH],
+              code=_sources("data_processor", "schema", "fraud_model", "model_registry", "compiled_model")),
+        Stage("predict", predict_stage, inputs=[PROCESSED_DATA_PATH, LATEST_MODEL_PATH, MODEL_ALIASES_PATH],
+              outputs=[FINAL_PREDICTIONS_PATH],
+              code=_sources("data_processor", "schema", "fraud_model", "model_registry", "decision_engine")),
+    ]
+
+def run_pipeline(num_records=1000, metrics_path=METRICS_PATH, profile_stage=None, force=False, max_workers=None):
     """
     Runs the end-to-end KYC fraud detection pipeline.
+
+    Stages whose inputs haven't changed since their last successful run are
+    skipped, so re-running after a failure resumes from the failed stage.
+
+    Args:
+        num_records (int): Number of synthetic records to generate.
+        metrics_path (str): File the Prometheus-format stage metrics are written to.
+        profile_stage (str): Optional stage name ("generate", "process", "verify",
+            "features", "train" or "predict") to run under the profiler.
+        force (bool): Re-run every stage, even if it is up to date.
+        max_workers (int): Maximum number of stages run concurrently.
+
+    Returns:
+        dict: Stage name -> "completed", "skipped", "failed" or "blocked".
     """
     os.makedirs(DATA_DIR, exist_ok=True)
     os.makedirs(MODELS_DIR, exist_ok=True)
 
     logging.info("Starting KYC Fraud Detection Pipeline...")
-
-    # Step 1: Generate Synthetic Data
-    try:
-        logging.info(f"Generating {num_records} synthetic KYC records...")
-        raw_df = generate_synthetic_kyc_data(n_records=num_records)
-        raw_df.to_csv(RAW_DATA_PATH, index=False)
-        logging.info(f"Synthetic data saved to {RAW_DATA_PATH}")
-    except Exception as e:
-        logging.error(f"Error generating synthetic data: {e}")
-        return
-
-    # Step 2: Process Data (Clean and Apply Rule-Based Detection)
-    try:
-        logging.info("Processing KYC data (cleaning and rule-based detection)...")
-        processed_df = process_kyc_data(raw_df)
-        logging.info(f"Processed data saved to {PROCESSED_DATA_PATH}")
-    except Exception as e:
-        logging.error(f"Error processing data: {e}")
-        return
-
-    # Step 3: Simulate ID Document and Facial Verification
-    # In the main pipeline, we still simulate the *paths* to images
-    # but the underlying IDDocumentProcessor and FaceVerifier will now
-    # attempt to perform real (simplified) OCR and face detection/matching
-    try:
-        logging.info("Simulating ID document and facial verification...")
-        id_processor = IDDocumentProcessor()
-        face_verifier = FaceVerifier()
-
-        # For simplicity, we'll simulate verification for the first record
-        # In a real system, this would happen for each new application
-        sample_record = processed_df.iloc[0]
-
-        # Create dummy image files for testing the real OCR and face detection
-        # In a real scenario, these would be actual user uploads
-        dummy_image_dir = os.path.join(DATA_DIR, "dummy_images")
-        os.makedirs(dummy_image_dir, exist_ok=True)
-
-        dummy_id_path = "/home/ubuntu/upload/id.jpg"
-        dummy_live_photo_path = "/home/ubuntu/upload/avinash.jpg"
-
-        # Process document using real OCR
-        doc_verification_result = id_processor.process_document(dummy_id_path)
-        extracted_doc_face_annotation = face_verifier.detect_face(doc_verification_result["document_image_path"])
-
-        # Process live photo using real face detection
-        live_photo_face_annotation = face_verifier.detect_face(dummy_live_photo_path)
-
-        # Face matching
-        face_match_confidence = face_verifier.match_faces(extracted_doc_face_annotation, live_photo_face_annotation)
-
-        # Aggregate verification results
-        verification_results = {
-            "authenticity_score": doc_verification_result["authenticity_score"],
-            "extracted_data": doc_verification_result["extracted_data"],
-            "face_match_confidence": face_match_confidence
-        }
-
-        # Add these new features to the processed_df
-        # For simplicity, applying to all rows with the same simulated result
-        # In a real system, each row would have its own verification result
-        processed_df = add_id_verification_features(processed_df, verification_results)
-        processed_df.to_csv(PROCESSED_DATA_PATH, index=False)
-        logging.info("ID document and facial verification processed and features added.")
-
-    except Exception as e:
-        logging.error(f"Error during ID/Facial verification: {e}")
-        return
-
-    # Step 4: Train Fraud Detection Model
+    runner = PipelineRunner(build_pipeline_stages(num_records), PIPELINE_STATE_PATH,
+                            max_workers=max_workers, profile_stage=profile_stage)
     try:
-        logging.info("Training fraud detection model...")
-        trained_model, scaler = train_fraud_model(processed_df, model_path=MODEL_PATH)
-        logging.info(f"Model trained and saved to {MODEL_PATH}")
-    except Exception as e:
-        logging.error(f"Error training model: {e}")
-        return
-
-    # Step 5: Predict Fraud
-    try:
-        logging.info("Making fraud predictions...")
-        final_df = predict_fraud(processed_df, trained_model, scaler)
-        final_df.to_csv(FINAL_PREDICTIONS_PATH, index=False)
-        logging.info(f"Final predictions saved to {FINAL_PREDICTIONS_PATH}")
-    except Exception as e:
-        logging.error(f"Error making predictions: {e}")
-        return
-
-    logging.info("Pipeline completed successfully!")
+        status = runner.run(force=force)
+    finally:
+        if metrics_path:
+            metrics.write_metrics(metrics_path)
+            logging.info(f"Pipeline metrics written to {metrics_path}")
+
+    if all(result in ("completed", "skipped") for result in status.values()):
+        logging.info("Pipeline completed successfully!")
+    else:
+        failed = [name for name, result in status.items() if result == "failed"]
+        logging.error(f"Pipeline stopped: stage(s) {', '.join(failed)} failed. "
+                      "Re-run to resume from the failed stage.")
+    return status
 
 if __name__ == "__main__":
-    run_pipeline(num_records=500)
-
-
-
+    parser = argparse.ArgumentParser(description="Run the KYC fraud detection pipeline.")
+    parser.add_argument("--records", type=int, default=500, help="Number of synthetic records to generate.")
+    parser.add_argument("--force", action="store_true", help="Re-run every stage, even if up to date.")
+    args = parser.parse_args()
+
+    # Set KYC_METRICS_PORT to also expose the metrics over HTTP while the pipeline runs
+    metrics_port = os.environ.get("KYC_METRICS_PORT")
+    if metrics_port:
+        metrics.start_metrics_server(int(metrics_port))
+    run_pipeline(num_records=args.records, force=args.force)
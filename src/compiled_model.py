@@ -0,0 +1,127 @@
+import numpy as np
+
+# Thresholds from prepare_features in fraud_model.py
+HIGH_TXN_AMOUNT = 50000
+HIGH_TXN_COUNT = 30
+
+
+def compile_model(model, scaler, path):
+    """
+    Exports a fitted RandomForestClassifier and StandardScaler to `path` (.npz).
+
+    The trees are flattened into shared node arrays; each tree's nodes are
+    offset so child indices point into the shared arrays.
+
+    Args:
+        model: The trained RandomForestClassifier.
+        scaler: The fitted StandardScaler.
+        path (str): Output path.
+    """
+    fraud_class = list(model.classes_).index(1)
+    roots, left, right, feature, threshold, fraud_share = [], [], [], [], [], []
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left == -1
+        node_ids = np.arange(tree.node_count)
+        roots.append(offset)
+        # Leaves point at themselves, so traversal can run a fixed number of steps
+        left.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+        right.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+        value = tree.value[:, 0, :]
+        fraud_share.append(value[:, fraud_class] / value.sum(axis=1))
+        offset += tree.node_count
+
+    np.savez_compressed(
+        path,
+        feature_names=np.asarray(scaler.feature_names_in_, dtype=str),
+        mean=scaler.mean_,
+        scale=scaler.scale_,
+        roots=np.asarray(roots, dtype=np.int64),
+        left=np.concatenate(left).astype(np.int64),
+        right=np.concatenate(right).astype(np.int64),
+        feature=np.concatenate(feature).astype(np.int64),
+        threshold=np.concatenate(threshold).astype(np.float64),
+        fraud_share=np.concatenate(fraud_share).astype(np.float64),
+        max_depth=np.int64(max(estimator.tree_.max_depth for estimator in model.estimators_)),
+    )
+
+
+class CompiledModel:
+    """
+    A random forest and scaler evaluated with vectorized NumPy.
+
+    Loading and scoring need only NumPy, so a scoring process doesn't pay the
+    import cost of pandas or scikit-learn. Scores match the original model's
+    predict_proba.
+    """
+
+    def __init__(self, arrays):
+        self.feature_names = [str(name) for name in arrays["feature_names"]]
+        self.mean = arrays["mean"]
+        self.scale = arrays["scale"]
+        self.roots = arrays["roots"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.fraud_share = arrays["fraud_share"]
+        self.max_depth = int(arrays["max_depth"])
+
+    def fraud_probability(self, features, batch_size=10_000):
+        """
+        Fraud probabilities for an unscaled feature matrix.
+
+        Args:
+            features (np.ndarray): Rows of features in self.feature_names order.
+            batch_size (int): Rows evaluated at once; bounds memory use.
+
+        Returns:
+            np.ndarray: The probability of fraud for each row.
+        """
+        # Like scikit-learn's trees, compare float32 features with the thresholds
+        X = ((np.asarray(features, dtype=np.float64) - self.mean) / self.scale).astype(np.float32)
+        result = np.empty(len(X))
+        for start in range(0, len(X), batch_size):
+            batch = X[start:start + batch_size]
+            rows = np.arange(len(batch))[:, None]
+            nodes = np.broadcast_to(self.roots, (len(batch), len(self.roots)))
+            for _ in range(self.max_depth):
+                go_left = batch[rows, self.feature[nodes]] <= self.threshold[nodes]
+                nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+            result[start:start + len(batch)] = self.fraud_share[nodes].mean(axis=1)
+        return result
+
+    def features_from_records(self, records):
+        """
+        Builds the model's feature matrix from raw applicant records (dicts).
+
+        Mirrors prepare_features in fraud_model.py without needing pandas.
+        """
+        txn_count = np.array([float(r["TxnCount"]) for r in records])
+        txn_amount = np.array([float(r["TxnAmount"]) for r in records])
+        columns = {
+            "TxnCount": txn_count,
+            "TxnAmount": txn_amount,
+            "HighTxnAmount": txn_amount > HIGH_TXN_AMOUNT,
+            "HighTxnCount": txn_count > HIGH_TXN_COUNT,
+            "PAN_Valid": np.array([len(str(r.get("PAN") or "")) == 10 for r in records]),
+            "Email_Valid": np.array(["@" in str(r.get("Email") or "") for r in records]),
+        }
+        return np.column_stack([columns[name] for name in self.feature_names]).astype(np.float64)
+
+
+def load_compiled_model(path):
+    """
+    Loads a model written by compile_model.
+
+    Args:
+        path (str): Path to the .npz file.
+
+    Returns:
+        CompiledModel: The model, ready for scoring.
+    """
+    with np.load(path) as arrays:
+        return CompiledModel({name: arrays[name] for name in arrays.files})
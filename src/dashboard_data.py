@@ -0,0 +1,240 @@
+import csv
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_processor import load_kyc_csv
+
+# Columns the aggregates are computed from; the rest of the file is never parsed
+AGGREGATE_COLUMNS = ["RuleFlag", "ML_Prediction", "Fraud_Probability", "TxnAmount", "TxnCount"]
+DENSITY_COLUMNS = ["TxnAmount", "TxnCount"]
+
+CHUNK_SIZE = 500_000
+PROBABILITY_BINS = 30
+DENSITY_BINS = (40, 25)       # (x bins, probability bins)
+SAMPLE_PER_CLASS = 2_000      # scatter-plot points kept per ML_Prediction class
+PAGE_INDEX_STRIDE = 10_000   # rows between the byte offsets kept for read_page
+READ_BLOCK_SIZE = 16 * 2**20  # bytes read at a time while indexing rows
+AGGREGATES_SUFFIX = ".aggregates.json"
+AGGREGATES_FORMAT = 2         # bump when the aggregates change shape, to invalidate cached files
+
+
+def predictions_version(path):
+    """
+    Cheap version string for a predictions file, based on its size and mtime.
+
+    Returns None if the file doesn't exist.
+    """
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def _read_chunks(path, columns, chunksize):
+    return pd.read_csv(path, usecols=columns, chunksize=chunksize)
+
+
+def _row_ends(block, in_quotes):
+    """
+    Positions in `block` of the newlines that end a CSV row.
+
+    Newlines inside quoted fields don't end a row; `in_quotes` says whether
+    the block starts inside one. Returns the positions and whether the block
+    ends inside a quoted field.
+    """
+    raw = np.frombuffer(block, dtype=np.uint8)
+    newlines = np.flatnonzero(raw == ord("\n"))
+    quotes = np.flatnonzero(raw == ord('"'))
+    if len(quotes) == 0 and not in_quotes:
+        return newlines, False
+    # A newline ends a row when an even number of quotes precedes it
+    quotes_before = np.searchsorted(quotes, newlines) + in_quotes
+    return newlines[quotes_before % 2 == 0], bool((len(quotes) + in_quotes) % 2)
+
+
+def _read_indexed_chunks(path, columns, chunksize):
+    """
+    Streams a CSV in chunks like _read_chunks, also yielding the byte offset
+    at which each row starts, so callers can index the file as they read it.
+
+    One handle scans ahead for row boundaries; a second is positioned at the
+    start of each chunk for the CSV parser, so no data is copied in Python.
+
+    Yields:
+        (pd.DataFrame, np.ndarray): The chunk's `columns` and its row offsets.
+    """
+    with open(path, "rb") as scan, open(path, "rb") as rows:
+        names = next(csv.reader([scan.readline().decode()]))
+        position = scan.tell()
+        starts = np.array([position], dtype=np.int64)  # offsets of the rows not yet yielded
+        in_quotes = False
+        row_count = 0
+        while True:
+            block = scan.read(READ_BLOCK_SIZE)
+            if block:
+                ends, in_quotes = _row_ends(block, in_quotes)
+                starts = np.concatenate([starts, position + ends + 1])
+                position += len(block)
+            else:
+                starts = starts[starts < position]  # the offset after the final newline starts no row
+            # A row is complete once the next row's start has been seen
+            while len(starts) > chunksize or (not block and len(starts)):
+                chunk_starts, starts = starts[:chunksize], starts[chunksize:]
+                rows.seek(chunk_starts[0])
+                chunk = pd.read_csv(rows, header=None, names=names, usecols=columns, nrows=len(chunk_starts))
+                chunk.index = pd.RangeIndex(row_count, row_count + len(chunk))
+                row_count += len(chunk)
+                yield chunk, chunk_starts
+            if not block:
+                return
+
+
+def _value_ranges(path, chunksize):
+    lows = {col: np.inf for col in DENSITY_COLUMNS}
+    highs = {col: -np.inf for col in DENSITY_COLUMNS}
+    for chunk in _read_chunks(path, DENSITY_COLUMNS, chunksize):
+        for col in DENSITY_COLUMNS:
+            lows[col] = min(lows[col], chunk[col].min())
+            highs[col] = max(highs[col], chunk[col].max())
+    return {col: (float(lows[col]), float(highs[col]) if highs[col] > lows[col] else float(lows[col]) + 1.0)
+            for col in DENSITY_COLUMNS}
+
+
+def compute_aggregates(path, chunksize=CHUNK_SIZE, sample_per_class=SAMPLE_PER_CLASS, seed=0,
+                       page_index_stride=PAGE_INDEX_STRIDE):
+    """
+    Computes everything the dashboard charts need in a bounded-memory pass.
+
+    The predictions file is streamed in chunks, reading only the columns the
+    charts use. Flag counts, a probability histogram and 2-D density grids of
+    TxnAmount/TxnCount against Fraud_Probability are accumulated exactly over
+    the records the model scored; rule-decided records have no probability.
+    A uniform random sample of up to `sample_per_class` scored rows per
+    ML_Prediction class is kept for scatter plots, so rare classes stay visible. The byte
+    offset of every `page_index_stride`-th row is recorded in the same pass,
+    so read_page can seek straight to any page.
+
+    Args:
+        path (str): Path to final_kyc_predictions.csv.
+        chunksize (int): Rows read per chunk.
+        sample_per_class (int): Scatter-plot sample size per ML_Prediction class.
+        seed (int): Seed for the sample.
+        page_index_stride (int): Rows between recorded byte offsets.
+
+    Returns:
+        dict: JSON-serializable aggregates.
+    """
+    rng = np.random.default_rng(seed)
+    ranges = _value_ranges(path, chunksize)
+    prob_edges = np.linspace(0.0, 1.0, PROBABILITY_BINS + 1)
+    density_prob_edges = np.linspace(0.0, 1.0, DENSITY_BINS[1] + 1)
+    density_x_edges = {col: np.linspace(*ranges[col], DENSITY_BINS[0] + 1) for col in DENSITY_COLUMNS}
+
+    row_count = 0
+    rule_flag_counts = pd.Series(dtype="int64")
+    ml_prediction_counts = pd.Series(dtype="int64")
+    prob_counts = np.zeros(PROBABILITY_BINS, dtype=np.int64)
+    density_counts = {col: np.zeros(DENSITY_BINS, dtype=np.int64) for col in DENSITY_COLUMNS}
+    sample = pd.DataFrame()
+    page_offsets = []
+
+    for chunk, row_starts in _read_indexed_chunks(path, AGGREGATE_COLUMNS, chunksize):
+        page_offsets.extend(row_starts[-row_count % page_index_stride::page_index_stride].tolist())
+        row_count += len(chunk)
+        rule_flag_counts = rule_flag_counts.add(chunk["RuleFlag"].value_counts(), fill_value=0)
+        ml_prediction_counts = ml_prediction_counts.add(chunk["ML_Prediction"].value_counts(), fill_value=0)
+        chunk = chunk[chunk["Fraud_Probability"].notna()]
+        probabilities = chunk["Fraud_Probability"].to_numpy()
+        prob_counts += np.histogram(probabilities, bins=prob_edges)[0]
+        for col in DENSITY_COLUMNS:
+            density_counts[col] += np.histogram2d(chunk[col].to_numpy(), probabilities,
+                                                  bins=[density_x_edges[col], density_prob_edges])[0].astype(np.int64)
+
+        # Keep the rows with the smallest random keys per class: a uniform
+        # sample of each class over everything read so far.
+        chunk = chunk.assign(_key=rng.random(len(chunk)))
+        sample = (pd.concat([sample, chunk])
+                  .sort_values("_key")
+                  .groupby("ML_Prediction", sort=False)
+                  .head(sample_per_class))
+
+    sample = sample.drop(columns="_key", errors="ignore").sort_index()
+    return {
+        "row_count": int(row_count),
+        "rule_flag_counts": {k: int(v) for k, v in rule_flag_counts.items()},
+        "ml_prediction_counts": {k: int(v) for k, v in ml_prediction_counts.items()},
+        "probability_histogram": {"edges": prob_edges.tolist(), "counts": prob_counts.tolist()},
+        "density": {
+            col: {"x_edges": density_x_edges[col].tolist(), "y_edges": density_prob_edges.tolist(),
+                  "counts": density_counts[col].tolist()}
+            for col in DENSITY_COLUMNS
+        },
+        "sample": sample.to_dict(orient="list"),
+        "page_index": {"stride": page_index_stride, "offsets": page_offsets},
+    }
+
+
+def load_or_compute_aggregates(path):
+    """
+    Returns the aggregates for the current version of the predictions file.
+
+    Aggregates are persisted next to the predictions file, so they are
+    computed once per version of the predictions and reused across dashboard
+    restarts and sessions.
+
+    Returns:
+        dict: The aggregates, or None if the predictions file doesn't exist.
+    """
+    version = predictions_version(path)
+    if version is None:
+        return None
+    cache_path = path + AGGREGATES_SUFFIX
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path) as f:
+                cached = json.load(f)
+            if cached.get("version") == version and cached.get("format") == AGGREGATES_FORMAT:
+                return cached["aggregates"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    aggregates = compute_aggregates(path)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": version, "format": AGGREGATES_FORMAT, "aggregates": aggregates}, f)
+    os.replace(tmp_path, cache_path)
+    return aggregates
+
+
+def read_page(path, page, page_size=50, page_index=None):
+    """
+    Reads one page of the predictions file without loading the rest.
+
+    With a page index, the file is read from the nearest indexed row before
+    the page, so at most one stride of rows is skipped whatever the page
+    number. Without one, every row before the page is parsed.
+
+    Args:
+        path (str): Path to the predictions CSV.
+        page (int): Zero-based page number.
+        page_size (int): Rows per page.
+        page_index (dict): The "page_index" entry of the aggregates.
+
+    Returns:
+        pd.DataFrame: The rows on that page, using the compact KYC dtypes.
+    """
+    start = page * page_size
+    with open(path, "rb") as f:
+        names = next(csv.reader([f.readline().decode()]))
+        first_row = 0
+        if page_index and page_index["offsets"]:
+            block = min(start // page_index["stride"], len(page_index["offsets"]) - 1)
+            first_row = block * page_index["stride"]
+            f.seek(page_index["offsets"][block])
+        page_df = load_kyc_csv(f, compact=True, header=None, names=names, skiprows=start - first_row,
+                               nrows=page_size)
+    page_df.index = range(start, start + len(page_df))
+    return page_df
@@ -1,15 +1,49 @@
 import pandas as pd
-from faker import Faker
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+import os
 import random
 import re
 
-# Initialize Faker
-fake = Faker()
+# Faker is slow to import and to construct, so it is only loaded when a
+# Faker-based generator actually runs.
+_fake = None
+
+def _get_faker():
+    """The shared Faker instance, created on first use."""
+    global _fake
+    if _fake is None:
+        from faker import Faker
+        _fake = Faker()
+    return _fake
 
 # Blacklisted entities (for demonstration - in real app, these would be external)
 BLACKLISTED_PAN = {"ABCDE1234F", "PQRST6789L"}
 BLACKLISTED_AADHAAR = {"1234 5678 9012", "1111 2222 3333"}
 
+# Fraud patterns injected by the vectorized generator. Rates are fractions of
+# rows in each chunk; the blacklist rates match generate_synthetic_kyc_data.
+DEFAULT_FRAUD_PATTERNS = {
+    "blacklisted_pan_rate": 0.02,
+    "blacklisted_aadhaar_rate": 0.02,
+    "duplicate_identity_rate": 0.01,  # identity fields copied from another row
+    "velocity_burst_rate": 0.005,     # rows that start a burst on a shared mobile/email
+    "velocity_burst_size": 10,
+}
+
+KYC_COLUMNS = ["CustomerID", "Name", "DOB", "PAN", "Aadhaar", "Email", "Mobile",
+               "Address", "TxnCount", "TxnAmount"]
+IDENTITY_COLUMNS = ["Name", "DOB", "PAN", "Aadhaar", "Email", "Mobile", "Address"]
+
+_UPPER = np.frombuffer(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ", dtype=np.uint8)
+_HEX = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+_EMAIL_DOMAINS = np.array(["example.com", "example.org", "example.net"])
+
+# Ages are computed relative to this date rather than today, so a seed
+# produces the same data whenever it is run.
+REFERENCE_DATE = date(2025, 1, 1)
+
 def generate_synthetic_kyc_data(n_records=1000):
     """
     Generates synthetic KYC (Know Your Customer) data.
@@ -20,6 +54,10 @@ def generate_synthetic_kyc_data(n_records=1000):
     Returns:
         pd.DataFrame: A DataFrame containing the synthetic KYC data.
     """
+    fake = _get_faker()
+    # fake.unique remembers every PAN it has handed out; reset it per call so
+    # repeated invocations don't grow that state without bound.
+    fake.unique.clear()
     data = []
     for _ in range(n_records):
         name = fake.name()
@@ -50,12 +88,189 @@ def generate_synthetic_kyc_data(n_records=1000):
         })
     return pd.DataFrame(data)
 
+def _ascii_rows(codes):
+    """Convert an (n, width) uint8 array of ASCII codes into an array of str."""
+    codes = np.ascontiguousarray(codes, dtype=np.uint8)
+    return codes.view(f"S{codes.shape[1]}").ravel().astype(str)
+
+def _random_digits(rng, n, width):
+    return rng.integers(ord("0"), ord("9") + 1, size=(n, width), dtype=np.uint8)
+
+def _random_pan(rng, n):
+    codes = np.empty((n, 10), dtype=np.uint8)
+    codes[:, :5] = _UPPER[rng.integers(0, 26, size=(n, 5))]
+    codes[:, 5:9] = _random_digits(rng, n, 4)
+    codes[:, 9] = _UPPER[rng.integers(0, 26, size=n)]
+    return _ascii_rows(codes)
+
+def _random_aadhaar(rng, n):
+    codes = np.full((n, 14), ord(" "), dtype=np.uint8)
+    for start in (0, 5, 10):
+        codes[:, start:start + 4] = _random_digits(rng, n, 4)
+    return _ascii_rows(codes)
+
+def _random_uuid4(rng, n):
+    nibbles = rng.integers(0, 16, size=(n, 32), dtype=np.uint8)
+    nibbles[:, 12] = 4                           # version
+    nibbles[:, 16] = 8 | (nibbles[:, 16] & 0x3)  # RFC 4122 variant
+    codes = np.full((n, 36), ord("-"), dtype=np.uint8)
+    for dst, src, width in ((0, 0, 8), (9, 8, 4), (14, 12, 4), (19, 16, 4), (24, 20, 12)):
+        codes[:, dst:dst + width] = _HEX[nibbles[:, src:src + width]]
+    return _ascii_rows(codes)
+
+def _random_dob(rng, n, reference_date, minimum_age=18, maximum_age=90):
+    reference = np.datetime64(reference_date, "D")
+    days = rng.integers(minimum_age * 365, (maximum_age + 1) * 365, size=n)
+    return np.datetime_as_string(reference - days, unit="D")
+
+def _sample_pools(seed, pool_size):
+    """Pre-sample Faker names, addresses and e-mail user names for one shard."""
+    from faker import Faker
+
+    shard_fake = Faker()
+    shard_fake.seed_instance(seed)
+    names = np.array([shard_fake.name() for _ in range(pool_size)])
+    addresses = np.array([shard_fake.address().replace("\n", ", ") for _ in range(pool_size)])
+    users = np.array([shard_fake.user_name() for _ in range(pool_size)])
+    return names, addresses, users
+
+def _inject_fraud_patterns(rng, df, patterns):
+    n = len(df)
+    if n == 0:
+        return df
+
+    pan_mask = rng.random(n) < patterns["blacklisted_pan_rate"]
+    df.loc[pan_mask, "PAN"] = rng.choice(sorted(BLACKLISTED_PAN), size=int(pan_mask.sum()))
+    aadhaar_mask = rng.random(n) < patterns["blacklisted_aadhaar_rate"]
+    df.loc[aadhaar_mask, "Aadhaar"] = rng.choice(sorted(BLACKLISTED_AADHAAR), size=int(aadhaar_mask.sum()))
+
+    # Duplicate identities: a new CustomerID re-using another applicant's details.
+    dup_rows = np.flatnonzero(rng.random(n) < patterns["duplicate_identity_rate"])
+    if len(dup_rows):
+        sources = rng.integers(0, n, size=len(dup_rows))
+        df.iloc[dup_rows, df.columns.get_indexer(IDENTITY_COLUMNS)] = \
+            df.iloc[sources, df.columns.get_indexer(IDENTITY_COLUMNS)].to_numpy()
+
+    # Velocity bursts: a run of applications sharing one mobile/e-mail, each
+    # with a high transaction count.
+    burst_size = int(patterns["velocity_burst_size"])
+    starts = np.flatnonzero(rng.random(n) < patterns["velocity_burst_rate"])
+    if len(starts) and burst_size > 1:
+        rows = (starts[:, None] + np.arange(burst_size)).ravel()
+        leaders = np.repeat(starts, burst_size)
+        in_chunk = rows < n
+        rows, leaders = rows[in_chunk], leaders[in_chunk]
+        contact = df.columns.get_indexer(["Email", "Mobile"])
+        df.iloc[rows, contact] = df.iloc[leaders, contact].to_numpy()
+        df.iloc[rows, df.columns.get_loc("TxnCount")] = rng.integers(31, 51, size=len(rows))
+    return df
+
+def generate_kyc_chunk(n_records, seed, fraud_patterns=None, pool_size=2000, reference_date=REFERENCE_DATE):
+    """
+    Generates one chunk of synthetic KYC data using vectorized NumPy sampling.
+
+    Names, addresses and e-mail user names are drawn from small Faker pools
+    sampled once per chunk; every other field is generated with NumPy.
+
+    Args:
+        n_records (int): The number of records in the chunk.
+        seed (int or np.random.SeedSequence): Seed for the chunk; equal seeds
+            produce identical chunks.
+        fraud_patterns (dict): Overrides for DEFAULT_FRAUD_PATTERNS.
+        pool_size (int): Number of distinct names/addresses to pre-sample.
+        reference_date (datetime.date): Date that applicant ages are relative to.
+
+    Returns:
+        pd.DataFrame: A DataFrame with the same columns as generate_synthetic_kyc_data.
+    """
+    patterns = {**DEFAULT_FRAUD_PATTERNS, **(fraud_patterns or {})}
+    seed_seq = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    rng = np.random.default_rng(seed_seq)
+    names, addresses, users = _sample_pools(int(seed_seq.generate_state(1)[0]), pool_size)
+
+    n = n_records
+    email_users = users[rng.integers(0, pool_size, size=n)]
+    email_suffix = rng.integers(0, 100, size=n).astype(str)
+    email_domains = _EMAIL_DOMAINS[rng.integers(0, len(_EMAIL_DOMAINS), size=n)]
+    emails = np.char.add(np.char.add(np.char.add(email_users, email_suffix), "@"), email_domains)
+
+    df = pd.DataFrame({
+        "CustomerID": _random_uuid4(rng, n),
+        "Name": names[rng.integers(0, pool_size, size=n)],
+        "DOB": _random_dob(rng, n, reference_date),
+        "PAN": _random_pan(rng, n),
+        "Aadhaar": _random_aadhaar(rng, n),
+        "Email": emails,
+        "Mobile": _ascii_rows(_random_digits(rng, n, 10)),
+        "Address": addresses[rng.integers(0, pool_size, size=n)],
+        "TxnCount": rng.integers(1, 51, size=n),
+        "TxnAmount": np.round(rng.uniform(100, 100000, size=n), 2),
+    }, columns=KYC_COLUMNS)
+    return _inject_fraud_patterns(rng, df, patterns)
+
+def _write_chunk(args):
+    path, n_records, seed, fraud_patterns, pool_size, reference_date = args
+    df = generate_kyc_chunk(n_records, seed, fraud_patterns=fraud_patterns, pool_size=pool_size,
+                            reference_date=reference_date)
+    df.to_csv(path, index=False)
+    return path, len(df)
+
+def generate_kyc_data_to_disk(n_records, output_dir, chunk_size=250_000, n_workers=None,
+                              seed=0, fraud_patterns=None, pool_size=2000, reference_date=REFERENCE_DATE):
+    """
+    Generates a large synthetic KYC dataset in parallel, streaming chunks to disk.
+
+    The dataset is split into chunks of `chunk_size` rows. Each chunk gets its
+    own child seed spawned from `seed`, so the output is identical regardless
+    of `n_workers`. Chunks are written as `part-00000.csv`, `part-00001.csv`, ...
+    and never held in memory together.
+
+    Args:
+        n_records (int): Total number of records to generate.
+        output_dir (str): Directory that receives the chunk CSV files.
+        chunk_size (int): Number of records per chunk file.
+        n_workers (int): Number of worker processes (defaults to CPU count).
+        seed (int): Root seed for the whole dataset.
+        fraud_patterns (dict): Overrides for DEFAULT_FRAUD_PATTERNS.
+        pool_size (int): Number of distinct names/addresses per chunk.
+        reference_date (datetime.date): Date that applicant ages are relative to.
+
+    Returns:
+        list: Paths of the written chunk files, in order.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    n_chunks = max(1, -(-n_records // chunk_size))
+    child_seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    tasks = []
+    for i, child_seed in enumerate(child_seeds):
+        rows = min(chunk_size, n_records - i * chunk_size)
+        path = os.path.join(output_dir, f"part-{i:05d}.csv")
+        tasks.append((path, rows, child_seed, fraud_patterns, pool_size, reference_date))
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        return [path for path, _ in executor.map(_write_chunk, tasks)]
+
 if __name__ == "__main__":
-    # Example usage when run directly
-    df = generate_synthetic_kyc_data(n_records=50)
-    print("Generated 50 synthetic KYC records:")
-    print(df.head())
-    # In a real pipeline, this would be saved to a specific path
-    # df.to_csv("../data/sample_kyc_data.csv", index=False)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate synthetic KYC data.")
+    parser.add_argument("--records", type=int, help="Generate this many records for load testing.")
+    parser.add_argument("--output-dir", default="load_test_data", help="Directory for chunk CSV files.")
+    parser.add_argument("--chunk-size", type=int, default=250_000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.records:
+        paths = generate_kyc_data_to_disk(args.records, args.output_dir, chunk_size=args.chunk_size,
+                                          n_workers=args.workers, seed=args.seed)
+        print(f"Wrote {args.records} records to {len(paths)} chunk files in {args.output_dir}")
+    else:
+        # Example usage when run directly
+        df = generate_synthetic_kyc_data(n_records=50)
+        print("Generated 50 synthetic KYC records:")
+        print(df.head())
+        # In a real pipeline, this would be saved to a specific path
+        # df.to_csv("../data/sample_kyc_data.csv", index=False)
 
 
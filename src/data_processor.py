@@ -1,6 +1,9 @@
 import pandas as pd
 import re
 
+from schema import COMPACT_DTYPES, to_compact
+from dedup import drop_duplicate_records
+
 # Validation patterns
 PAN_REGEX = r"[A-Z]{5}[0-9]{4}[A-Z]"
 AADHAAR_REGEX = r"\d{4} \d{4} \d{4}"
@@ -11,6 +14,27 @@ MOBILE_REGEX = r"[6-9]\d{9}"
 BLACKLISTED_PAN = {"ABCDE1234F", "PQRST6789L"}
 BLACKLISTED_AADHAAR = {"1234 5678 9012", "1111 2222 3333"}
 
+# Bit set in the RuleHits column for each rule a record trips, so later
+# stages can test individual rules without parsing RuleReason.
+RULE_BITS = {
+    "Invalid PAN format": 1 << 0,
+    "Invalid Aadhaar format": 1 << 1,
+    "Invalid Email": 1 << 2,
+    "Invalid Mobile": 1 << 3,
+    "Blacklisted PAN": 1 << 4,
+    "Blacklisted Aadhaar": 1 << 5,
+    "High transaction amount": 1 << 6,
+    "High transaction count": 1 << 7,
+    "Low Document Authenticity": 1 << 8,
+    "Liveness Check Failed": 1 << 9,
+    "Face Match Failed": 1 << 10,
+    "Name Mismatch with ID": 1 << 11,
+}
+
+def rule_hits(reasons):
+    """RuleHits bitmask for a list of rule names."""
+    return sum(RULE_BITS[reason] for reason in reasons)
+
 def validate_pan(pan):
     """Validate PAN format."""
     return bool(re.fullmatch(PAN_REGEX, pan))
@@ -35,18 +59,47 @@ def is_blacklisted_aadhaar(aadhaar):
     """Check if Aadhaar is blacklisted."""
     return aadhaar in BLACKLISTED_AADHAAR
 
-def clean_data(df):
+# Identifier columns that must stay strings when read back from CSV
+# (pandas would otherwise parse Mobile as an integer).
+STRING_COLUMNS = ["CustomerID", "Name", "DOB", "PAN", "Aadhaar", "Email", "Mobile", "Address"]
+
+def load_kyc_csv(path, compact=False, **read_csv_kwargs):
+    """
+    Load a KYC CSV written by the pipeline, keeping identifiers as strings.
+
+    Args:
+        path (str): Path to the CSV file.
+        compact (bool): Parse processed data straight into the compact dtypes
+            from schema.to_compact. Leave False for raw data, whose
+            identifiers still need format validation.
+        **read_csv_kwargs: Passed through to pd.read_csv (e.g. nrows, skiprows).
+
+    Returns:
+        pd.DataFrame: The KYC data.
+    """
+    if compact:
+        return to_compact(pd.read_csv(path, dtype=COMPACT_DTYPES, **read_csv_kwargs))
+    df = pd.read_csv(path, dtype={col: str for col in STRING_COLUMNS}, **read_csv_kwargs)
+    if "RuleReason" in df.columns:
+        df["RuleReason"] = df["RuleReason"].fillna("")
+    return df
+
+def clean_data(df, fingerprint_store=None):
     """
     Clean the KYC data by removing duplicates and handling missing values.
 
+    Duplicates are keyed on the dedup.RECORD_KEY_COLUMNS present in `df`.
+
     Args:
         df (pd.DataFrame): The raw KYC data.
+        fingerprint_store (FingerprintStore): Optional store of records seen in
+            earlier runs; those records are dropped as duplicates too.
 
     Returns:
         pd.DataFrame: The cleaned KYC data.
     """
-    # Remove duplicates
-    df = df.drop_duplicates()
+    # Remove duplicate applications, comparing canonicalized identity fields
+    df = drop_duplicate_records(df, store=fingerprint_store)
     
     # Handle missing values
     df = df.dropna(subset=["Name", "PAN", "Aadhaar", "Email", "Mobile", "DOB"])
@@ -109,12 +162,13 @@ def apply_rule_based_detection(df):
             reasons.append("High transaction count")
         
         if suspicious:
-            return "Suspicious", "; ".join(reasons)
-        return "Valid", ""
+            return "Suspicious", "; ".join(reasons), rule_hits(reasons)
+        return "Valid", "", 0
     
     results = df.apply(flag_record, axis=1, result_type='expand')
     df["RuleFlag"] = results[0]
     df["RuleReason"] = results[1]
+    df["RuleHits"] = results[2]
     
     return df
 
@@ -126,11 +180,12 @@ def process_kyc_data(df):
         df (pd.DataFrame): The raw KYC data.
 
     Returns:
-        pd.DataFrame: The processed KYC data with rule-based flags.
+        pd.DataFrame: The processed KYC data with rule-based flags, using the
+        compact dtypes from schema.to_compact.
     """
     df_cleaned = clean_data(df)
     df_processed = apply_rule_based_detection(df_cleaned)
-    return df_processed
+    return to_compact(df_processed)
 
 if __name__ == "__main__":
     # Example usage when run directly
@@ -190,15 +245,17 @@ def add_id_verification_features(df, verification_results):
             reasons.append("Name Mismatch with ID")
 
         if suspicious:
-            return "Suspicious", "; ".join(reasons)
-        return "Valid", ""
+            return "Suspicious", "; ".join(reasons), rule_hits(reasons)
+        return "Valid", "", 0
 
     # Append new rule reasons to existing ones
     verification_results_df = df.apply(flag_verification_issues, axis=1, result_type="expand")
-    df["RuleFlag"] = df.apply(lambda row: "Suspicious" if row["RuleFlag"] == "Suspicious" or verification_results_df.loc[row.name, 0] == "Suspicious" else "Valid", axis=1)
-    df["RuleReason"] = df["RuleReason"] + "; " + verification_results_df[1]
+    suspicious = (df["RuleFlag"] == "Suspicious") | (verification_results_df[0] == "Suspicious")
+    df["RuleFlag"] = suspicious.map({True: "Suspicious", False: "Valid"})
+    df["RuleReason"] = df["RuleReason"].astype(str) + "; " + verification_results_df[1]
     df["RuleReason"] = df["RuleReason"].str.strip("; ")
+    df["RuleHits"] = df["RuleHits"].astype("int64") | verification_results_df[2].astype("int64")
 
-    return df
+    return to_compact(df)
 
 
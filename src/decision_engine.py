@@ -0,0 +1,213 @@
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from data_processor import rule_hits
+from fraud_model import prepare_features
+from schema import RULE_HITS_COLUMN, to_compact
+import metrics
+
+# Tier 1: rules that reject an applicant outright
+HARD_REJECT_RULES = ["Blacklisted PAN", "Blacklisted Aadhaar"]
+
+# Tier 2: cheap checks that decide a record without the model
+CHEAP_REJECT_RULES = ["Invalid PAN format", "Invalid Aadhaar format"]
+
+
+def _split_points(model, n_features):
+    """
+    Sorted split thresholds of each feature across a tree ensemble.
+
+    Returns None for models that aren't tree ensembles.
+    """
+    estimators = getattr(model, "estimators_", None)
+    if not n_features or estimators is None or not all(hasattr(e, "tree_") for e in estimators):
+        return None
+    thresholds = [[] for _ in range(n_features)]
+    for estimator in estimators:
+        tree = estimator.tree_
+        internal = tree.children_left != -1
+        for i in range(n_features):
+            thresholds[i].append(tree.threshold[internal & (tree.feature == i)])
+    return [np.unique(np.concatenate(t)) for t in thresholds]
+
+
+class DecisionEngine:
+    """
+    Tiered fraud decisions: hard rules, then cheap rules, then the ML model.
+
+    Tiers are read from the RuleHits bitmask that rule-based detection
+    already computed, so no rule is evaluated twice. Records rejected by a
+    hard rule skip all further checks; records rejected by a cheap rule skip
+    the model. Both are reported as Fraud; their Fraud_Probability is left
+    empty (NaN), since no model scored them. Only the remaining, ambiguous
+    records are scored by the model. Their feature vectors are de-duplicated within a batch and memoized
+    across batches in an LRU cache, so equivalent vectors are scored once.
+
+    For tree ensembles such as the random forest, two vectors are equivalent
+    when every feature falls between the same pair of split thresholds: each
+    tree then takes the same path for both, so the shared score is exact
+    while continuous features like TxnAmount collapse to a few keys.
+
+    Args:
+        model: The trained ML model.
+        scaler: The fitted scaler.
+        cache_size (int): Maximum number of memoized feature vectors.
+        key_decimals (int): For models other than tree ensembles, scaled
+            features are rounded to this many decimals before the cache
+            lookup, so near-identical vectors share a score, trading a little
+            accuracy for more cache hits. Ignored for tree ensembles.
+        hard_rules (list): Rule names (keys of data_processor.RULE_BITS); defaults to HARD_REJECT_RULES.
+        cheap_rules (list): Rule names; defaults to CHEAP_REJECT_RULES.
+        shadow (ShadowScorer): Optional candidate models scored on the same
+            features as the model tier, for comparison only.
+        model_version (str): Version label for the production model's metrics.
+    """
+
+    def __init__(self, model, scaler, cache_size=100_000, key_decimals=None, hard_rules=None, cheap_rules=None,
+                 shadow=None, model_version="production"):
+        self.model = model
+        self.scaler = scaler
+        self.cache_size = cache_size
+        self.key_decimals = key_decimals
+        self.hard_rules = HARD_REJECT_RULES if hard_rules is None else hard_rules
+        self.cheap_rules = CHEAP_REJECT_RULES if cheap_rules is None else cheap_rules
+        self._hard_bits = rule_hits(self.hard_rules)
+        self._cheap_bits = rule_hits(self.cheap_rules)
+        self.shadow = shadow
+        self.model_version = model_version
+        self._cache = OrderedDict()
+        self._split_points = _split_points(model, len(getattr(scaler, "mean_", ())))
+        self.last_stats = {}
+
+    @staticmethod
+    def _tripped(df, bits):
+        """Boolean mask of records that tripped any rule in the `bits` mask."""
+        return pd.Series((df[RULE_HITS_COLUMN].to_numpy().astype(np.int64) & bits) != 0, index=df.index)
+
+    def hard_rejected(self, df):
+        """Boolean mask of records rejected by a hard rule."""
+        return self._tripped(df, self._hard_bits)
+
+    def _cache_keys(self, features):
+        """Per-row cache keys: split-interval indices for tree ensembles, feature values otherwise."""
+        if self._split_points is None:
+            if self.key_decimals is None:
+                return features.to_numpy(dtype=np.float64)
+            return np.round(self.scaler.transform(features), self.key_decimals)
+        # Trees compare float32 features with their thresholds
+        scaled = self.scaler.transform(features).astype(np.float32).astype(np.float64)
+        return np.column_stack([np.searchsorted(points, scaled[:, i]) for i, points in enumerate(self._split_points)])
+
+    def _score(self, features):
+        """Fraud probabilities for a feature matrix, using the memo cache."""
+        stats = {"unique_feature_vectors": 0, "cache_hits": 0, "model_evaluations": 0, "model_seconds": 0.0}
+        if len(features) == 0:
+            return np.empty(0), stats
+
+        values = features.to_numpy(dtype=np.float64)
+        key_values = self._cache_keys(features)
+        unique_keys, first_rows, inverse = np.unique(key_values, axis=0, return_index=True, return_inverse=True)
+        keys = [row.tobytes() for row in unique_keys]
+        stats["unique_feature_vectors"] = len(keys)
+
+        unique_probabilities = np.empty(len(keys))
+        misses = []
+        for i, key in enumerate(keys):
+            cached = self._cache.get(key)
+            if cached is None:
+                misses.append(i)
+            else:
+                self._cache.move_to_end(key)
+                unique_probabilities[i] = cached
+        stats["cache_hits"] = len(keys) - len(misses)
+
+        if misses:
+            start = time.perf_counter()
+            # Every vector sharing a key gets the same score, so score its first occurrence
+            to_score = pd.DataFrame(values[first_rows[misses]], columns=features.columns)
+            scored = self.model.predict_proba(self.scaler.transform(to_score))[:, 1]
+            stats["model_seconds"] = time.perf_counter() - start
+            metrics.REGISTRY.observe("kyc_model_inference_seconds", stats["model_seconds"],
+                                     help_text="Model inference time per batch.", role="production",
+                                     version=self.model_version)
+            stats["model_evaluations"] = len(misses)
+            unique_probabilities[misses] = scored
+            for i, probability in zip(misses, scored):
+                self._cache[keys[i]] = probability
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return unique_probabilities[inverse.ravel()], stats
+
+    def decide(self, df):
+        """
+        Adds ML_Prediction, Fraud_Probability and Decision_Tier to the data.
+
+        Args:
+            df (pd.DataFrame): The processed KYC data.
+
+        Returns:
+            pd.DataFrame: The data with predictions; stats are in self.last_stats.
+        """
+        start = time.perf_counter()
+        hard = self.hard_rejected(df)
+        cheap = self._tripped(df, self._cheap_bits) & ~hard
+        ambiguous = ~(hard | cheap)
+
+        features, _ = prepare_features(df.loc[ambiguous])
+        probabilities, score_stats = self._score(features)
+        if self.shadow is not None:
+            self.shadow.score(features, probabilities, df.loc[ambiguous, "CustomerID"])
+
+        result = df.copy()
+        result["Fraud_Probability"] = np.nan
+        result.loc[ambiguous, "Fraud_Probability"] = probabilities
+        result["ML_Prediction"] = np.where(~ambiguous | (result["Fraud_Probability"] > 0.5), "Fraud", "Valid")
+        result["Decision_Tier"] = np.select([hard, cheap], ["hard_rule", "cheap_rule"], default="model")
+        elapsed = time.perf_counter() - start
+
+        rows = len(df)
+        stats = {
+            "rows": rows,
+            "hard_rule_decisions": int(hard.sum()),
+            "cheap_rule_decisions": int(cheap.sum()),
+            "model_rows": int(ambiguous.sum()),
+            **score_stats,
+            "model_evaluations_skipped": rows - score_stats["model_evaluations"],
+            "seconds": elapsed,
+            "rows_per_sec": rows / elapsed if elapsed > 0 else None,
+        }
+        # Throughput gained: compare with scoring every row at the measured per-row model cost
+        if score_stats["model_evaluations"]:
+            per_row = score_stats["model_seconds"] / score_stats["model_evaluations"]
+            baseline = elapsed - score_stats["model_seconds"] + per_row * rows
+            stats["estimated_speedup"] = baseline / elapsed if elapsed > 0 else None
+        self.last_stats = stats
+        self._record_metrics(stats)
+        return to_compact(result)
+
+    def _record_metrics(self, stats):
+        for tier, key in [("hard_rule", "hard_rule_decisions"), ("cheap_rule", "cheap_rule_decisions"),
+                          ("model", "model_rows")]:
+            metrics.REGISTRY.inc("kyc_decisions_total", stats[key], help_text="Decisions by tier.", tier=tier)
+        metrics.REGISTRY.inc("kyc_model_evaluations_total", stats["model_evaluations"],
+                             help_text="Feature vectors scored by the model.")
+        metrics.REGISTRY.inc("kyc_model_evaluations_skipped_total", stats["model_evaluations_skipped"],
+                             help_text="Rows decided without a model evaluation.")
+        hits, unique = stats["cache_hits"], stats["unique_feature_vectors"]
+        metrics.record_cache_access("model_score", hit=True, count=hits)
+        metrics.record_cache_access("model_score", hit=False, count=unique - hits)
+
+    def summary(self):
+        """One-line description of the last decide() call."""
+        s = self.last_stats
+        if not s:
+            return "No decisions made yet"
+        text = (f"{s['rows']} rows: {s['hard_rule_decisions']} hard-rule, {s['cheap_rule_decisions']} cheap-rule, "
+                f"{s['model_rows']} model ({s['unique_feature_vectors']} unique vectors, {s['cache_hits']} cache hits); "
+                f"{s['model_evaluations_skipped']} model evaluations skipped")
+        if s.get("estimated_speedup"):
+            text += f"; ~{s['estimated_speedup']:.1f}x faster than scoring every row"
+        return text
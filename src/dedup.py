@@ -0,0 +1,289 @@
+import argparse
+import logging
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Fields that identify a person. Address is free text and is left out.
+IDENTITY_KEY_COLUMNS = ["Name", "DOB", "PAN", "Aadhaar"]
+
+# Fields that identify one application: the same customer submitted twice.
+# Different CustomerIDs sharing an identity are kept (they are a fraud signal)
+# and reported as identity clusters instead.
+RECORD_KEY_COLUMNS = ["CustomerID", "Name", "DOB", "PAN", "Aadhaar", "Email", "Mobile"]
+
+
+def _digits(series):
+    return series.str.replace(r"\D", "", regex=True)
+
+
+def _casefold(series):
+    return series.str.casefold().str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+# Canonical form of each key column, so formatting differences don't create distinct keys
+CANONICALIZERS = {
+    "CustomerID": lambda s: s.str.lower().str.strip(),
+    "Name": _casefold,
+    "DOB": _digits,
+    "PAN": lambda s: s.str.upper().str.replace(r"\s+", "", regex=True),
+    "Aadhaar": _digits,
+    "Email": lambda s: s.str.lower().str.strip(),
+    "Mobile": lambda s: _digits(s).str[-10:],
+}
+
+
+def _key_columns_in(df, key_columns):
+    """The key columns present in `df`, or all of its columns if none are."""
+    present = [col for col in key_columns if col in df.columns]
+    return present or list(df.columns)
+
+
+def canonicalize(df, key_columns=RECORD_KEY_COLUMNS):
+    """Canonical string form of the key columns (missing values become "")."""
+    canonical = pd.DataFrame(index=df.index)
+    for col in _key_columns_in(df, key_columns):
+        values = df[col].fillna("").astype(str)
+        canonical[col] = CANONICALIZERS.get(col, _casefold)(values)
+    return canonical
+
+
+def fingerprints(df, key_columns=RECORD_KEY_COLUMNS):
+    """
+    64-bit fingerprints of the canonicalized key columns.
+
+    Key columns missing from `df` are left out of the key. A frame with none
+    of them is keyed on all of its columns, like DataFrame.drop_duplicates.
+
+    Args:
+        df (pd.DataFrame): KYC data.
+        key_columns (list): Columns that make up the key.
+
+    Returns:
+        np.ndarray: One uint64 fingerprint per row.
+    """
+    # Keys are mostly unique, so factorizing before hashing (categorize=True) only adds work
+    return pd.util.hash_pandas_object(canonicalize(df, key_columns), index=False, categorize=False).to_numpy()
+
+
+def _first_occurrences(fps):
+    """Boolean mask of the first occurrence of each fingerprint."""
+    first = np.zeros(len(fps), dtype=bool)
+    first[np.unique(fps, return_index=True)[1]] = True
+    return first
+
+
+class FingerprintStore:
+    """
+    Persistent set of 64-bit fingerprints, sharded on disk.
+
+    Fingerprints are split into 2**shard_bits shards by their top bits, and
+    each shard is a sorted .npy file that is memory-mapped for lookups. New
+    fingerprints are buffered and merged into their shards once the buffer
+    reaches `buffer_size`, so memory stays bounded by the buffer plus one
+    shard however many fingerprints the store holds.
+
+    Args:
+        directory (str): Directory holding the shard files.
+        shard_bits (int): log2 of the number of shards.
+        buffer_size (int): Pending fingerprints kept in memory before flushing.
+    """
+
+    def __init__(self, directory, shard_bits=8, buffer_size=10_000_000):
+        self.directory = directory
+        self.shard_bits = shard_bits
+        self.buffer_size = buffer_size
+        self._pending = {}
+        self._pending_count = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _shard_path(self, shard):
+        return os.path.join(self.directory, f"shard-{shard:04x}.npy")
+
+    def _load_shard(self, shard):
+        path = self._shard_path(shard)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=np.uint64)
+        return np.load(path, mmap_mode="r")
+
+    @staticmethod
+    def _isin_sorted(sorted_values, values):
+        if len(sorted_values) == 0:
+            return np.zeros(len(values), dtype=bool)
+        positions = np.searchsorted(sorted_values, values)
+        positions[positions == len(sorted_values)] = 0
+        return sorted_values[positions] == values
+
+    def _group_by_shard(self, fps):
+        shards = (fps >> np.uint64(64 - self.shard_bits)).astype(np.int64)
+        order = np.argsort(shards, kind="stable")
+        boundaries = np.flatnonzero(np.diff(shards[order])) + 1
+        for group in np.split(order, boundaries):
+            if len(group):
+                yield int(shards[group[0]]), group
+
+    def check_and_add(self, fps):
+        """
+        Adds fingerprints to the store.
+
+        Args:
+            fps (np.ndarray): uint64 fingerprints.
+
+        Returns:
+            np.ndarray: Boolean mask, True where the fingerprint was already in
+            the store or occurs earlier in `fps`.
+        """
+        fps = np.asarray(fps, dtype=np.uint64)
+        seen = ~_first_occurrences(fps)
+        for shard, rows in self._group_by_shard(fps):
+            candidates = rows[~seen[rows]]
+            values = fps[candidates]
+            known = self._isin_sorted(self._load_shard(shard), values)
+            for pending in self._pending.get(shard, []):
+                known |= self._isin_sorted(pending, values)
+            seen[candidates] = known
+            new = np.sort(values[~known])
+            if len(new):
+                self._pending.setdefault(shard, []).append(new)
+                self._pending_count += len(new)
+        if self._pending_count >= self.buffer_size:
+            self.flush()
+        return seen
+
+    def flush(self):
+        """Merges the buffered fingerprints into their shard files."""
+        for shard, pending in self._pending.items():
+            merged = np.union1d(self._load_shard(shard), np.concatenate(pending))
+            tmp_path = f"{self._shard_path(shard)}.{os.getpid()}.tmp.npy"
+            np.save(tmp_path, merged)
+            os.replace(tmp_path, self._shard_path(shard))
+        self._pending = {}
+        self._pending_count = 0
+
+    def __len__(self):
+        on_disk = sum(len(self._load_shard(shard)) for shard in range(2 ** self.shard_bits))
+        return on_disk + self._pending_count
+
+
+def drop_duplicate_records(df, key_columns=RECORD_KEY_COLUMNS, store=None):
+    """
+    Drops rows whose canonicalized key was seen before, keeping the first.
+
+    Args:
+        df (pd.DataFrame): KYC data.
+        key_columns (list): Columns that make up the key.
+        store (FingerprintStore): If provided, rows already seen in earlier
+            runs are dropped too, and this frame's keys are added to the store.
+
+    Returns:
+        pd.DataFrame: The de-duplicated data.
+    """
+    fps = fingerprints(df, key_columns)
+    duplicate = ~_first_occurrences(fps) if store is None else store.check_and_add(fps)
+    metrics.REGISTRY.inc("kyc_duplicate_records_total", int(duplicate.sum()),
+                         help_text="Records dropped as duplicates.")
+    return df[~duplicate]
+
+
+def duplicate_clusters(df, key_columns=IDENTITY_KEY_COLUMNS, id_column="CustomerID"):
+    """
+    Groups rows that share a canonicalized key.
+
+    Args:
+        df (pd.DataFrame): KYC data.
+        key_columns (list): Columns that make up the key.
+        id_column (str): Column listed for the members of each cluster.
+
+    Returns:
+        pd.DataFrame: One row per cluster with more than one member:
+        Fingerprint, Size and the member ids, largest clusters first.
+    """
+    fps = pd.Series(fingerprints(df, key_columns), index=df.index)
+    repeated = fps[fps.duplicated(keep=False)]
+    members = df.loc[repeated.index, id_column].astype(str)
+    clusters = members.groupby(repeated.to_numpy()).agg(["size", ";".join])
+    clusters.columns = ["Size", "Members"]
+    clusters.index.name = "Fingerprint"
+    return clusters.sort_values("Size", ascending=False).reset_index()
+
+
+def dedup_csv(input_path, output_path, key_columns=RECORD_KEY_COLUMNS, store=None, chunksize=1_000_000,
+              clusters_path=None, id_column="CustomerID"):
+    """
+    De-duplicates a CSV of any size in bounded memory.
+
+    Rows are read in chunks, fingerprinted and checked against `store` (a
+    temporary store when None); first occurrences are appended to
+    `output_path`. If `clusters_path` is given, a second pass writes every
+    input row whose key is duplicated, within this file or against the
+    store's earlier contents, as (Fingerprint, id) pairs.
+
+    Args:
+        input_path (str): CSV to de-duplicate.
+        output_path (str): Where the de-duplicated CSV is written.
+        key_columns (list): Columns that make up the key.
+        store (FingerprintStore): Persistent store for cross-run de-duplication.
+        chunksize (int): Rows per chunk.
+        clusters_path (str): Optional CSV for the duplicate clusters.
+        id_column (str): Column written for cluster members.
+
+    Returns:
+        dict: rows, kept and duplicates counts, plus clusters when reported.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if store is None:
+            store = FingerprintStore(tmp_dir)
+        stats = {"rows": 0, "kept": 0, "duplicates": 0}
+        duplicate_fps = []
+        first_chunk = True
+        for chunk in pd.read_csv(input_path, dtype=str, keep_default_na=False, chunksize=chunksize):
+            fps = fingerprints(chunk, key_columns)
+            duplicate = store.check_and_add(fps)
+            duplicate_fps.append(np.unique(fps[duplicate]))
+            chunk[~duplicate].to_csv(output_path, mode="w" if first_chunk else "a", header=first_chunk, index=False)
+            first_chunk = False
+            stats["rows"] += len(chunk)
+            stats["duplicates"] += int(duplicate.sum())
+        store.flush()
+        stats["kept"] = stats["rows"] - stats["duplicates"]
+        metrics.REGISTRY.inc("kyc_duplicate_records_total", stats["duplicates"],
+                             help_text="Records dropped as duplicates.")
+
+        if clusters_path:
+            # Only fingerprints that occurred more than once are kept in memory
+            repeated = np.unique(np.concatenate(duplicate_fps)) if duplicate_fps else np.empty(0, dtype=np.uint64)
+            first_chunk = True
+            for chunk in pd.read_csv(input_path, dtype=str, keep_default_na=False, chunksize=chunksize,
+                                     usecols=list(dict.fromkeys(key_columns + [id_column]))):
+                fps = fingerprints(chunk, key_columns)
+                in_cluster = FingerprintStore._isin_sorted(repeated, fps)
+                pd.DataFrame({"Fingerprint": fps[in_cluster], id_column: chunk[id_column].to_numpy()[in_cluster]}) \
+                    .to_csv(clusters_path, mode="w" if first_chunk else "a", header=first_chunk, index=False)
+                first_chunk = False
+            stats["clusters"] = len(repeated)
+    return stats
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="De-duplicate a KYC CSV by canonicalized identity fingerprints.")
+    parser.add_argument("input_path")
+    parser.add_argument("output_path")
+    parser.add_argument("--store", default=None,
+                        help="Fingerprint store directory; records seen in earlier runs are dropped too.")
+    parser.add_argument("--identity", action="store_true",
+                        help="Key on the person (Name, DOB, PAN, Aadhaar) instead of the application.")
+    parser.add_argument("--clusters", default=None, help="CSV to write duplicate clusters to.")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    key_columns = IDENTITY_KEY_COLUMNS if args.identity else RECORD_KEY_COLUMNS
+    store = FingerprintStore(args.store) if args.store else None
+    stats = dedup_csv(args.input_path, args.output_path, key_columns, store, args.chunk_size, args.clusters)
+    logger.info(f"De-duplication finished: {stats}")
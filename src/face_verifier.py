@@ -1,11 +1,18 @@
 
+import logging
 import random
 import os
-from google.cloud import vision
+import metrics
+
+logger = logging.getLogger(__name__)
 
 class FaceVerifier:
-    def __init__(self):
-        self.client = vision.ImageAnnotatorClient()
+    def __init__(self, client=None):
+        # Accept an existing client so callers can share one (or pass a stub).
+        if client is None:
+            from google.cloud import vision
+            client = vision.ImageAnnotatorClient()
+        self.client = client
 
     def detect_face(self, image_path: str):
         """
@@ -13,21 +20,33 @@ class FaceVerifier:
         Returns the detected face annotations or None if no face is found.
         """
         if not os.path.exists(image_path):
-            print(f"Error: Image file not found at {image_path}")
+            logger.error(f"Error: Image file not found at {image_path}")
             return None
 
         with open(image_path, 'rb') as image_file:
             content = image_file.read()
+        return self.detect_face_content(content, source=image_path)
+
+    def detect_face_content(self, content: bytes, source: str = "<upload>"):
+        """
+        Same as detect_face, for an image already held in memory.
+        `source` is only used in log messages.
+        """
+        from google.cloud import vision
+
         image = vision.Image(content=content)
         request = vision.AnnotateImageRequest(
             image=image,
             features=[vision.Feature(type_=vision.Feature.Type.FACE_DETECTION)],
         )
-        response = self.client.annotate_image(request=request)
+        with metrics.timer("kyc_vision_face_detection_latency_seconds",
+                           help_text="Google Vision face detection call latency."):
+            response = self.client.annotate_image(request=request)
         faces = response.face_annotations
 
         if not faces:
-            print(f"No face detected in {image_path}")
+            logger.warning(f"No face detected in {source}")
+            metrics.REGISTRY.inc("kyc_faces_not_detected_total", help_text="Images with no detected face.")
             return None
         return faces[0]
 
@@ -1,12 +1,8 @@
-import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import classification_report, accuracy_score
-import joblib
 import os
 
+from schema import to_compact
+
 def prepare_features(df):
     """
     Prepare features for machine learning model.
@@ -23,7 +19,7 @@ def prepare_features(df):
     # Create additional features
     features['HighTxnAmount'] = (df['TxnAmount'] > 50000).astype(int)
     features['HighTxnCount'] = (df['TxnCount'] > 30).astype(int)
-    features['PAN_Valid'] = df['PAN'].apply(lambda x: 1 if len(x) == 10 else 0)
+    features['PAN_Valid'] = (df['PAN'].str.len() == 10).astype(int)
     features['Email_Valid'] = df['Email'].str.contains('@').astype(int)
     
     # Create labels: 1 if flagged as suspicious by rules, 0 otherwise
@@ -41,17 +37,25 @@ def prepare_features(df):
     
     return features, labels
 
-def train_fraud_model(df, model_path=None):
+def train_fraud_model(df, model_path=None, registry=None):
     """
     Train a machine learning model for fraud detection.
 
     Args:
         df (pd.DataFrame): The processed KYC data.
         model_path (str): Path to save the trained model.
+        registry (ModelRegistry): If provided, the model is registered as a new version.
 
     Returns:
         tuple: (trained_model, scaler) for making predictions.
     """
+    # scikit-learn is only needed for training; scoring can use the compiled model
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.metrics import classification_report, accuracy_score
+    import joblib
+
     # Prepare features and labels
     X, y = prepare_features(df)
     
@@ -81,6 +85,11 @@ def train_fraud_model(df, model_path=None):
         os.makedirs(os.path.dirname(model_path), exist_ok=True)
         joblib.dump((model, scaler), model_path)
         print(f"\\nModel saved to: {model_path}")
+
+    if registry is not None:
+        version = registry.register(model, scaler, metadata={"accuracy": round(float(accuracy), 4),
+                                                             "training_rows": len(df)})
+        print(f"\\nModel registered as version: {version}")
     
     return model, scaler
 
@@ -111,7 +120,7 @@ def predict_fraud(df, model, scaler):
     df_with_predictions['ML_Prediction'] = np.where(predictions == 1, 'Fraud', 'Valid')
     df_with_predictions['Fraud_Probability'] = probabilities
     
-    return df_with_predictions
+    return to_compact(df_with_predictions)
 
 def load_model(model_path):
     """
@@ -123,6 +132,8 @@ def load_model(model_path):
     Returns:
         tuple: (model, scaler) loaded from disk.
     """
+    import joblib
+
     return joblib.load(model_path)
 
 if __name__ == "__main__":
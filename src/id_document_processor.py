@@ -1,17 +1,29 @@
 
+import logging
 import random
 import re
 import os
-from PIL import Image
-import pytesseract
-from google.cloud import vision
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Placeholder stored in every extracted field when OCR fails
+OCR_ERROR = "OCR_Error"
+
+
+def is_ocr_error(extracted_data: dict) -> bool:
+    """True if `extracted_data` is the placeholder returned when OCR failed."""
+    return extracted_data.get("document_id") == OCR_ERROR
+
 
 class IDDocumentProcessor:
-    def __init__(self):
+    def __init__(self, client=None):
         self.document_blacklist = {"123456789012", "987654321098"}
+        # Optional pre-built Vision client; a new one is created per OCR call otherwise.
+        self.client = client
 
     def process_document(self, document_image_path: str):
-        print(f"Processing document: {document_image_path}")
+        logger.info(f"Processing document: {document_image_path}")
 
         extracted_data = self._perform_ocr(document_image_path)
         authenticity_score = self._simulate_authenticity_check(extracted_data)
@@ -22,19 +34,45 @@ class IDDocumentProcessor:
             "document_image_path": document_image_path
         }
 
+    def process_document_content(self, content: bytes, source: str = "<upload>"):
+        """
+        Same as process_document, for an image already held in memory.
+        `source` is only used for logging and as the document path in the result.
+        """
+        logger.info(f"Processing document: {source}")
+
+        extracted_data = self._perform_ocr_content(content, source)
+        authenticity_score = self._simulate_authenticity_check(extracted_data)
+
+        return {
+            "extracted_data": extracted_data,
+            "authenticity_score": authenticity_score,
+            "document_image_path": source
+        }
+
     def _perform_ocr(self, document_image_path: str):
         try:
-            client = vision.ImageAnnotatorClient()
-
             with open(document_image_path, 'rb') as image_file:
                 content = image_file.read()
+        except OSError as e:
+            logger.error(f"Error reading document image: {e}")
+            return self._ocr_error_result(document_image_path)
+        return self._perform_ocr_content(content, document_image_path)
+
+    def _perform_ocr_content(self, content: bytes, document_image_path: str):
+        # Imported on first use: google.cloud.vision takes seconds to import
+        from google.cloud import vision
+
+        try:
+            client = self.client if self.client is not None else vision.ImageAnnotatorClient()
             image = vision.Image(content=content)
 
-            response = client.text_detection(image=image)
+            with metrics.timer("kyc_vision_ocr_latency_seconds", help_text="Google Vision OCR call latency."):
+                response = client.text_detection(image=image)
             texts = response.text_annotations
 
             full_text = texts[0].description if texts else ""
-            print(f"Google Vision OCR Extracted Text:\n{full_text}")
+            logger.debug(f"Google Vision OCR Extracted Text:\n{full_text}")
 
             # Attempt to parse common fields from the extracted text
             name = "N/A"
@@ -87,17 +125,22 @@ class IDDocumentProcessor:
                 "document_photo_for_matching_path": document_image_path # Still using original image for face extraction
             }
         except Exception as e:
-            print(f"Error during Google Vision OCR: {e}")
-            return {
-                "name": "OCR_Error",
-                "dob": "OCR_Error",
-                "document_id": "OCR_Error",
-                "address": "OCR_Error",
-                "expiry_date": "OCR_Error",
-                "document_type": "OCR_Error",
-                "gender": "OCR_Error",
-                "document_photo_for_matching_path": document_image_path
-            }
+            logger.error(f"Error during Google Vision OCR: {e}")
+            metrics.REGISTRY.inc("kyc_vision_errors_total", help_text="Failed Google Vision calls.", api="ocr")
+            return self._ocr_error_result(document_image_path)
+
+    def _ocr_error_result(self, document_image_path: str):
+        return {
+            "name": OCR_ERROR,
+            "dob": OCR_ERROR,
+            "document_id": OCR_ERROR,
+            "address": OCR_ERROR,
+            "expiry_date": OCR_ERROR,
+            "document_type": OCR_ERROR,
+            "gender": OCR_ERROR,
+            "document_photo_for_matching_path": document_image_path
+        }
+
     def _simulate_authenticity_check(self, extracted_data: dict) -> float:
         score = random.uniform(0.8, 0.99)
 
@@ -109,6 +152,8 @@ class IDDocumentProcessor:
         return max(0.0, score)
 
 if __name__ == '__main__':
+    from PIL import Image
+
     processor = IDDocumentProcessor()
     sample_doc_path = "/home/ubuntu/kyc_simplified_v2/data/sample_id_card.jpg"
     
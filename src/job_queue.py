@@ -0,0 +1,239 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+
+
+class QueueFullError(Exception):
+    """Raised by enqueue when the queue is at its back-pressure limit."""
+
+
+class Job:
+    """A job claimed from a broker."""
+
+    def __init__(self, job_id, payload, attempts):
+        self.id = job_id
+        self.payload = payload
+        self.attempts = attempts
+
+    def __repr__(self):
+        return f"Job({self.id!r}, attempts={self.attempts})"
+
+
+class Broker:
+    """
+    Interface for durable job queues with at-least-once delivery.
+
+    A claimed job is leased to one worker. If the worker neither acks nor
+    nacks it before the lease expires (e.g. the process died), the job becomes
+    claimable again, so every job is processed at least once. Job handlers
+    should therefore be idempotent.
+    """
+
+    def enqueue(self, payload, job_id=None, block=False, timeout=None):
+        """Add a job and return its id. Re-enqueuing an existing id is a no-op."""
+        raise NotImplementedError
+
+    def claim(self, worker_id, lease_seconds):
+        """Lease the next available job to `worker_id`, or return None."""
+        raise NotImplementedError
+
+    def extend_lease(self, job_id, worker_id, lease_seconds):
+        """Extend a lease still held by `worker_id`; returns False if it was lost."""
+        raise NotImplementedError
+
+    def ack(self, job_id, worker_id, result):
+        """Mark a job as done and store its result."""
+        raise NotImplementedError
+
+    def nack(self, job_id, worker_id, error, retry_delay=0.0):
+        """Release a failed job for retry (or dead-letter it after too many attempts)."""
+        raise NotImplementedError
+
+    def depth(self):
+        """Number of jobs waiting to be processed or currently leased."""
+        raise NotImplementedError
+
+    def get(self, job_id):
+        """Return a job's status, attempts, result and error as a dict (None if unknown)."""
+        raise NotImplementedError
+
+
+class SQLiteBroker(Broker):
+    """
+    Broker backed by a single SQLite file.
+
+    Any number of worker processes on the same host can share the file; claims
+    are serialized with write transactions. To scale across nodes, implement
+    Broker for a networked store and register it in BROKERS.
+
+    Args:
+        path (str): Path to the SQLite database file.
+        max_pending (int): Back-pressure limit on depth(); None for unbounded.
+        max_attempts (int): Deliveries before a job is moved to the "dead" state.
+    """
+
+    def __init__(self, path, max_pending=10_000, max_attempts=5):
+        self.path = path
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    available_at REAL NOT NULL,
+                    lease_expires REAL,
+                    worker TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, available_at)")
+
+    def _connect(self):
+        # A fresh connection per call keeps the broker safe to use from any thread
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, payload, job_id=None, block=False, timeout=None):
+        job_id = job_id or str(uuid.uuid4())
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.max_pending is not None and self.depth() >= self.max_pending:
+            if not block or (deadline is not None and time.monotonic() >= deadline):
+                raise QueueFullError(f"Queue {self.path} has {self.max_pending} or more pending jobs")
+            time.sleep(0.1)
+
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO jobs (id, payload, status, available_at, created_at, updated_at) "
+                "VALUES (?, ?, 'pending', ?, ?, ?)",
+                (job_id, json.dumps(payload), now, now, now),
+            )
+        return job_id
+
+    def claim(self, worker_id, lease_seconds):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, payload, attempts FROM jobs "
+                "WHERE (status = 'pending' AND available_at <= ?) OR (status = 'running' AND lease_expires < ?) "
+                "ORDER BY available_at LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            attempts = row["attempts"] + 1
+            if attempts > self.max_attempts:
+                # Delivered too often without an ack (e.g. crashes the worker): dead-letter it
+                conn.execute(
+                    "UPDATE jobs SET status = 'dead', worker = NULL, updated_at = ?, "
+                    "error = COALESCE(error, 'lease expired too many times') WHERE id = ?",
+                    (now, row["id"]),
+                )
+                conn.execute("COMMIT")
+                return self.claim(worker_id, lease_seconds)
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = ?, worker = ?, lease_expires = ?, updated_at = ? "
+                "WHERE id = ?",
+                (attempts, worker_id, now + lease_seconds, now, row["id"]),
+            )
+            conn.execute("COMMIT")
+            return Job(row["id"], json.loads(row["payload"]), attempts)
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def extend_lease(self, job_id, worker_id, lease_seconds):
+        now = time.time()
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (now + lease_seconds, now, job_id, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def ack(self, job_id, worker_id, result):
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ?",
+                (json.dumps(result), time.time(), job_id, worker_id),
+            )
+
+    def nack(self, job_id, worker_id, error, retry_delay=0.0):
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'dead' ELSE 'pending' END, "
+                "available_at = ?, lease_expires = NULL, worker = NULL, error = ?, updated_at = ? "
+                "WHERE id = ? AND worker = ?",
+                (self.max_attempts, now + retry_delay, str(error), now, job_id, worker_id),
+            )
+
+    def depth(self):
+        with self._connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'running')").fetchone()[0]
+
+    def get(self, job_id):
+        with self._connection() as conn:
+            row = conn.execute("SELECT status, attempts, result, error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+        }
+
+
+# Broker implementations by URL scheme, e.g. "sqlite:///data/onboarding_queue.db"
+BROKERS = {"sqlite": SQLiteBroker}
+
+
+def create_broker(url, **kwargs):
+    """
+    Create a broker from a URL of the form "<scheme>://<location>".
+
+    Args:
+        url (str): Broker URL; a bare path is treated as a SQLite file.
+        **kwargs: Passed to the broker constructor.
+
+    Returns:
+        Broker: The broker instance.
+    """
+    scheme, sep, location = url.partition("://")
+    if not sep:
+        scheme, location = "sqlite", url
+    if scheme not in BROKERS:
+        raise ValueError(f"Unknown broker scheme '{scheme}'. Known schemes: {', '.join(sorted(BROKERS))}")
+    if scheme == "sqlite" and location.startswith("/") and url.startswith("sqlite:///"):
+        location = location[1:]  # sqlite:///relative/path vs sqlite:////absolute/path
+    return BROKERS[scheme](location, **kwargs)
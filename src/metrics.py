@@ -0,0 +1,287 @@
+import cProfile
+import logging
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets (seconds) used for stage and external API histograms
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# Profiling is opt-in: set KYC_PROFILE_STAGE to a stage name (e.g. "train") to
+# profile that stage. KYC_PROFILE_MODE is "cprofile" (default) or "py-spy".
+PROFILE_STAGE_ENV = "KYC_PROFILE_STAGE"
+PROFILE_MODE_ENV = "KYC_PROFILE_MODE"
+PROFILE_DIR_ENV = "KYC_PROFILE_DIR"
+
+
+class MetricsRegistry:
+    """
+    A small, thread-safe store of counters, gauges and histograms that renders
+    in the Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._types = {}
+        self._values = {}      # (name, labels) -> float, for counters and gauges
+        self._histograms = {}  # (name, labels) -> [bucket counts, sum, count]
+        self._buckets = {}
+
+    def _register(self, name, metric_type, help_text):
+        self._types.setdefault(name, metric_type)
+        if help_text:
+            self._help.setdefault(name, help_text)
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name, value=1.0, help_text="", **labels):
+        """Increment a counter."""
+        with self._lock:
+            self._register(name, "counter", help_text)
+            key = self._key(name, labels)
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def set(self, name, value, help_text="", **labels):
+        """Set a gauge."""
+        with self._lock:
+            self._register(name, "gauge", help_text)
+            self._values[self._key(name, labels)] = float(value)
+
+    def set_max(self, name, value, help_text="", **labels):
+        """Raise a gauge to `value` if it is higher than the current value."""
+        with self._lock:
+            self._register(name, "gauge", help_text)
+            key = self._key(name, labels)
+            self._values[key] = max(self._values.get(key, float("-inf")), float(value))
+
+    def observe(self, name, value, help_text="", buckets=DEFAULT_BUCKETS, **labels):
+        """Record an observation in a histogram."""
+        with self._lock:
+            self._register(name, "histogram", help_text)
+            bounds = self._buckets.setdefault(name, tuple(buckets))
+            key = self._key(name, labels)
+            state = self._histograms.setdefault(key, [[0] * len(bounds), 0.0, 0])
+            for i, bound in enumerate(bounds):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def get(self, name, **labels):
+        """Return the current value of a counter or gauge (0.0 if unset)."""
+        with self._lock:
+            return self._values.get(self._key(name, labels), 0.0)
+
+    def reset(self):
+        with self._lock:
+            self._help.clear()
+            self._types.clear()
+            self._values.clear()
+            self._histograms.clear()
+            self._buckets.clear()
+
+    def render(self, const_labels=None):
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Args:
+            const_labels (dict): Labels added to every series, e.g. to tell
+                apart the metrics of several processes.
+        """
+        const = sorted((k, str(v)) for k, v in (const_labels or {}).items())
+
+        def fmt_labels(labels, extra=()):
+            pairs = const + list(labels) + list(extra)
+            if not pairs:
+                return ""
+            escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for _, v in pairs)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+        lines = []
+        with self._lock:
+            for name in sorted(self._types):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {self._types[name]}")
+                if self._types[name] == "histogram":
+                    for (metric, labels), (counts, total, count) in sorted(self._histograms.items()):
+                        if metric != name:
+                            continue
+                        for bound, bucket_count in zip(self._buckets[name], counts):
+                            lines.append(f"{name}_bucket{fmt_labels(labels, [('le', repr(float(bound)))])} {bucket_count}")
+                        lines.append(f"{name}_bucket{fmt_labels(labels, [('le', '+Inf')])} {count}")
+                        lines.append(f"{name}_sum{fmt_labels(labels)} {total}")
+                        lines.append(f"{name}_count{fmt_labels(labels)} {count}")
+                else:
+                    for (metric, labels), value in sorted(self._values.items()):
+                        if metric == name:
+                            lines.append(f"{name}{fmt_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide default registry
+REGISTRY = MetricsRegistry()
+
+
+def memory_high_water_bytes():
+    """Peak resident set size of this process, in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@contextmanager
+def timer(name, help_text="", registry=REGISTRY, **labels):
+    """Observe the duration of the wrapped block in the histogram `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe(name, time.perf_counter() - start, help_text=help_text, **labels)
+
+
+def record_cache_access(cache, hit, registry=REGISTRY, count=1):
+    """Count `count` cache hits or misses and update the cache's hit ratio gauge."""
+    if count <= 0:
+        return
+    registry.inc("kyc_cache_requests_total", count, help_text="Cache lookups by result.",
+                 cache=cache, result="hit" if hit else "miss")
+    hits = registry.get("kyc_cache_requests_total", cache=cache, result="hit")
+    misses = registry.get("kyc_cache_requests_total", cache=cache, result="miss")
+    registry.set("kyc_cache_hit_ratio", hits / (hits + misses), help_text="Fraction of cache lookups that hit.",
+                 cache=cache)
+
+
+@contextmanager
+def _profile(stage, mode, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    base = os.path.join(output_dir, f"{stage}-{os.getpid()}-{stamp}")
+
+    if mode == "py-spy":
+        py_spy = shutil.which("py-spy")
+        if py_spy is None:
+            logger.warning("py-spy not found on PATH; running stage '%s' without profiling", stage)
+            yield
+            return
+        output_path = f"{base}.svg"
+        proc = subprocess.Popen([py_spy, "record", "--pid", str(os.getpid()), "-o", output_path])
+        try:
+            yield
+        finally:
+            proc.terminate()
+            proc.wait()
+            logger.info("py-spy profile for stage '%s' written to %s", stage, output_path)
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        output_path = f"{base}.prof"
+        profiler.dump_stats(output_path)
+        logger.info("cProfile stats for stage '%s' written to %s", stage, output_path)
+
+
+@contextmanager
+def stage_timer(stage, rows=None, profile_stage=None, registry=REGISTRY):
+    """
+    Instruments one pipeline stage.
+
+    Records the stage duration, its row count, failures and the process memory
+    high-water mark. If `profile_stage` (or the KYC_PROFILE_STAGE environment
+    variable) names this stage, the stage is also profiled.
+
+    Args:
+        stage (str): Stage name used as the `stage` label.
+        rows (int): Number of rows the stage processes, if known up front. The
+            yielded dict can also be updated with a "rows" entry.
+        profile_stage (str): Name of the stage to profile, overriding the env var.
+        registry (MetricsRegistry): Registry that receives the metrics.
+    """
+    info = {"rows": rows}
+    profile_stage = profile_stage or os.environ.get(PROFILE_STAGE_ENV)
+    if profile_stage == stage:
+        mode = os.environ.get(PROFILE_MODE_ENV, "cprofile")
+        output_dir = os.environ.get(PROFILE_DIR_ENV, "profiles")
+        profiler = _profile(stage, mode, output_dir)
+    else:
+        profiler = None
+
+    start = time.perf_counter()
+    try:
+        if profiler is None:
+            yield info
+        else:
+            with profiler:
+                yield info
+    except Exception:
+        registry.inc("kyc_stage_failures_total", help_text="Pipeline stage failures.", stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.observe("kyc_stage_duration_seconds", elapsed, help_text="Pipeline stage wall time.",
+                         stage=stage)
+        registry.set("kyc_stage_last_duration_seconds", elapsed,
+                     help_text="Wall time of the most recent run of each stage.", stage=stage)
+        if info.get("rows") is not None:
+            registry.inc("kyc_stage_rows_total", info["rows"], help_text="Rows processed per stage.",
+                         stage=stage)
+        registry.set_max("kyc_memory_high_water_bytes", memory_high_water_bytes(),
+                         help_text="Peak resident set size of the process.")
+
+
+def write_metrics(path, registry=REGISTRY, const_labels=None):
+    """
+    Atomically write the metrics to `path` (e.g. for node_exporter's textfile collector).
+
+    Processes writing to the same collector directory need distinct
+    `const_labels`, or their series would clash.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(registry.render(const_labels))
+    os.replace(tmp_path, path)
+
+
+def start_metrics_server(port, host="0.0.0.0", registry=REGISTRY):
+    """
+    Serve the metrics at http://host:port/metrics from a daemon thread.
+
+    Returns:
+        ThreadingHTTPServer: The running server; call shutdown() to stop it.
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(format, *args)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info("Serving metrics on http://%s:%d/metrics", host, port)
+    return server
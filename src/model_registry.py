@@ -0,0 +1,262 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import joblib
+
+from compiled_model import compile_model
+import metrics
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_REGISTRY_DIR = os.path.join(ROOT_DIR, 'models', 'registry')
+
+MODEL_FILE = "model.pkl"
+METADATA_FILE = "metadata.json"
+ALIASES_FILE = "aliases.json"
+
+
+class ModelRegistry:
+    """
+    Versioned model store on disk.
+
+    Each version lives in <root>/<version>/ as a (model, scaler) pickle plus a
+    metadata JSON file. <root>/aliases.json names the production version and
+    the versions scored in shadow mode, and "latest" the most recently
+    registered one. Registering never overwrites an existing version;
+    registering a model identical to an existing version returns that version.
+
+    Args:
+        root (str): Registry directory.
+        production_path (str): If set, the production model is also copied
+            here on promotion, for consumers that load a single model file,
+            and compiled next to it as a NumPy-only .npz (see compiled_model).
+    """
+
+    def __init__(self, root=DEFAULT_REGISTRY_DIR, production_path=None):
+        self.root = root
+        self.production_path = production_path
+        self.aliases_path = os.path.join(root, ALIASES_FILE)
+        self._lock = threading.Lock()
+        self._loaded = {}
+        os.makedirs(root, exist_ok=True)
+
+    def versions(self):
+        """Registered versions, oldest first."""
+        return sorted(name for name in os.listdir(self.root)
+                      if not name.startswith(".") and os.path.isfile(os.path.join(self.root, name, MODEL_FILE)))
+
+    def metadata(self, version):
+        with open(os.path.join(self.root, version, METADATA_FILE)) as f:
+            return json.load(f)
+
+    def aliases(self):
+        """The {"production": version, "shadow": [versions], "latest": version} mapping."""
+        if not os.path.exists(self.aliases_path):
+            return {"production": None, "shadow": [], "latest": None}
+        with open(self.aliases_path) as f:
+            return json.load(f)
+
+    def _write_aliases(self, aliases):
+        tmp_path = f"{self.aliases_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(aliases, f, indent=2)
+        os.replace(tmp_path, self.aliases_path)
+
+    def register(self, model, scaler, metadata=None):
+        """
+        Stores a trained model as a new version.
+
+        Args:
+            model: The trained ML model.
+            scaler: The fitted scaler.
+            metadata (dict): Extra information to store, e.g. training rows or accuracy.
+
+        Returns:
+            str: The version name, e.g. "v0003".
+        """
+        with self._lock:
+            staging_dir = tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+            os.chmod(staging_dir, 0o755)
+            staging_model = os.path.join(staging_dir, MODEL_FILE)
+            joblib.dump((model, scaler), staging_model)
+            with open(staging_model, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+
+            existing = self.versions()
+            version = next((v for v in existing if self.metadata(v).get("sha256") == digest), None)
+            if version is not None:
+                shutil.rmtree(staging_dir)
+                logger.info(f"Model is identical to registered version {version}")
+            else:
+                version = f"v{int(existing[-1][1:]) + 1 if existing else 1:04d}"
+                with open(os.path.join(staging_dir, METADATA_FILE), "w") as f:
+                    json.dump({**(metadata or {}), "version": version, "sha256": digest,
+                               "registered_at": time.strftime("%Y-%m-%dT%H:%M:%S")}, f, indent=2)
+                os.replace(staging_dir, os.path.join(self.root, version))
+                logger.info(f"Registered model version {version}")
+
+            aliases = self.aliases()
+            aliases["latest"] = version
+            self._write_aliases(aliases)
+            return version
+
+    def resolve(self, name):
+        """Map "production" to its version; version names are returned unchanged."""
+        if name == "production":
+            version = self.aliases()["production"]
+            if version is None:
+                raise LookupError(f"No production model in {self.root}")
+            return version
+        if name not in self.versions():
+            raise LookupError(f"Unknown model version {name}")
+        return name
+
+    def load(self, name="production"):
+        """Load (model, scaler) for a version or "production", caching it in memory."""
+        version = self.resolve(name)
+        with self._lock:
+            if version not in self._loaded:
+                self._loaded[version] = joblib.load(os.path.join(self.root, version, MODEL_FILE))
+            return self._loaded[version]
+
+    def promote(self, version):
+        """Make `version` the production model and stop shadowing it."""
+        version = self.resolve(version)
+        aliases = self.aliases()
+        aliases["production"] = version
+        aliases["shadow"] = [v for v in aliases["shadow"] if v != version]
+        self._write_aliases(aliases)
+        if self.production_path:
+            os.makedirs(os.path.dirname(self.production_path), exist_ok=True)
+            shutil.copyfile(os.path.join(self.root, version, MODEL_FILE), self.production_path)
+            compile_model(*self.load(version), os.path.splitext(self.production_path)[0] + ".npz")
+        logger.info(f"Promoted model version {version} to production")
+
+    def set_shadow(self, versions):
+        """Set the versions scored in shadow mode next to production."""
+        aliases = self.aliases()
+        aliases["shadow"] = [self.resolve(v) for v in versions if v != aliases["production"]]
+        self._write_aliases(aliases)
+
+
+def traffic_fraction(keys, salt=""):
+    """Map keys (e.g. CustomerIDs) to stable values in [0, 1)."""
+    hashes = pd.util.hash_pandas_object(pd.Series(keys).astype(str) + salt, index=False).to_numpy()
+    return hashes / np.float64(2**64)
+
+
+class ShadowScorer:
+    """
+    Scores a share of traffic with candidate models next to production.
+
+    Candidates reuse the feature matrix already built for the production
+    model, so each one only adds its own scaling and inference. Records are
+    sampled by hashing their key, so a customer is either always or never
+    shadow-scored at a given fraction. Shadow results are only measured,
+    never returned as decisions.
+
+    Args:
+        candidates (dict): version -> (model, scaler).
+        fraction (float): Share of records scored by the candidates.
+        salt (str): Changes which records are sampled.
+    """
+
+    def __init__(self, candidates, fraction=0.1, salt=""):
+        self.candidates = candidates
+        self.fraction = fraction
+        self.salt = salt
+        self.last_stats = {}
+
+    @classmethod
+    def from_registry(cls, registry, fraction=0.1, salt=""):
+        """Shadow-score every version listed as shadow in the registry's aliases."""
+        versions = registry.aliases()["shadow"]
+        return cls({version: registry.load(version) for version in versions}, fraction, salt)
+
+    def score(self, features, production_probabilities, keys):
+        """
+        Scores the sampled records with every candidate and records the metrics.
+
+        Args:
+            features (pd.DataFrame): Unscaled features from prepare_features.
+            production_probabilities (np.ndarray): Production fraud probabilities.
+            keys (pd.Series): Per-record sampling keys, e.g. CustomerID.
+
+        Returns:
+            dict: version -> stats (rows, disagreements, mean absolute difference, seconds).
+        """
+        self.last_stats = {}
+        if not self.candidates or len(features) == 0:
+            return self.last_stats
+        sampled = traffic_fraction(keys, self.salt) < self.fraction
+        if not sampled.any():
+            return self.last_stats
+
+        sample = features[sampled]
+        production = np.asarray(production_probabilities)[sampled]
+        for version, (model, scaler) in self.candidates.items():
+            start = time.perf_counter()
+            candidate = model.predict_proba(scaler.transform(sample))[:, 1]
+            elapsed = time.perf_counter() - start
+            disagreements = int(((candidate > 0.5) != (production > 0.5)).sum())
+            stats = {
+                "rows": len(sample),
+                "disagreements": disagreements,
+                "disagreement_rate": disagreements / len(sample),
+                "mean_abs_diff": float(np.abs(candidate - production).mean()),
+                "seconds": elapsed,
+            }
+            self.last_stats[version] = stats
+            self._record_metrics(version, stats)
+            logger.info(f"Shadow model {version}: {disagreements}/{len(sample)} decisions differ from production "
+                        f"(mean |diff| {stats['mean_abs_diff']:.4f}, {elapsed * 1000:.1f} ms)")
+        return self.last_stats
+
+    @staticmethod
+    def _record_metrics(version, stats):
+        metrics.REGISTRY.observe("kyc_model_inference_seconds", stats["seconds"],
+                                 help_text="Model inference time per batch.", role="shadow", version=version)
+        metrics.REGISTRY.inc("kyc_shadow_rows_total", stats["rows"],
+                             help_text="Records scored by shadow models.", version=version)
+        metrics.REGISTRY.inc("kyc_shadow_disagreements_total", stats["disagreements"],
+                             help_text="Shadow decisions that differ from production.", version=version)
+        metrics.REGISTRY.set("kyc_shadow_mean_abs_diff", stats["mean_abs_diff"],
+                             help_text="Mean absolute probability difference to production in the last batch.",
+                             version=version)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Inspect and promote registered fraud models.")
+    parser.add_argument("--registry", default=DEFAULT_REGISTRY_DIR)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="List registered versions.")
+    promote = subparsers.add_parser("promote", help="Make a version the production model.")
+    promote.add_argument("version")
+    shadow = subparsers.add_parser("shadow", help="Set the versions scored in shadow mode.")
+    shadow.add_argument("versions", nargs="*")
+
+    args = parser.parse_args()
+    registry = ModelRegistry(args.registry,
+                             production_path=os.path.join(ROOT_DIR, 'models', 'fraud_detection_model.pkl'))
+    if args.command == "list":
+        aliases = registry.aliases()
+        for version in registry.versions():
+            role = ("production" if version == aliases["production"]
+                    else "shadow" if version in aliases["shadow"] else "")
+            meta = registry.metadata(version)
+            print(f"{version}  {meta['registered_at']}  accuracy={meta.get('accuracy', '?')}  {role}")
+    elif args.command == "promote":
+        registry.promote(args.version)
+    else:
+        registry.set_shadow(args.versions)
@@ -0,0 +1,289 @@
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+
+import pandas as pd
+
+from data_processor import process_kyc_data, add_id_verification_features
+from fraud_model import load_model
+from decision_engine import DecisionEngine
+from job_queue import create_broker
+import metrics
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BROKER_URL = os.path.join(ROOT_DIR, 'data', 'onboarding_queue.db')
+DEFAULT_MODEL_PATH = os.path.join(ROOT_DIR, 'models', 'fraud_detection_model.pkl')
+DEFAULT_METRICS_DIR = os.path.join(ROOT_DIR, 'data', 'worker_metrics')
+
+LEASE_SECONDS = 120     # how long a claimed job stays leased without a heartbeat
+POLL_INTERVAL = 1.0     # seconds to wait when the queue is empty
+RETRY_DELAY = 5.0       # seconds before a failed job is retried
+METRICS_INTERVAL = 15.0 # seconds between metrics file writes
+SCORE_DECIMALS = 6      # scores are float32; more decimals only show conversion noise
+
+
+def make_job_payload(applicant, document_image_path, live_photo_path):
+    """
+    Builds the payload of an onboarding job.
+
+    Args:
+        applicant (dict): One KYC record (CustomerID, Name, DOB, PAN, ...).
+        document_image_path (str): Path to the identity document image.
+        live_photo_path (str): Path to the live photo / selfie.
+
+    Returns:
+        dict: The JSON-serializable job payload.
+    """
+    return {
+        "applicant": applicant,
+        "document_image_path": document_image_path,
+        "live_photo_path": live_photo_path,
+    }
+
+
+def _decision_result(applicant, record):
+    """JSON-serializable decision for one scored record."""
+    def score(col):
+        value = record.get(col)
+        return None if value is None or pd.isna(value) else round(float(value), SCORE_DECIMALS)
+
+    return {
+        "CustomerID": applicant.get("CustomerID"),
+        "RuleFlag": str(record["RuleFlag"]),
+        "RuleReason": str(record["RuleReason"]),
+        "ML_Prediction": str(record["ML_Prediction"]),
+        "Fraud_Probability": score("Fraud_Probability"),
+        "Decision_Tier": str(record["Decision_Tier"]),
+        "ID_Doc_Authenticity_Score": score("ID_Doc_Authenticity_Score"),
+        "Face_Match_Confidence": score("Face_Match_Confidence"),
+    }
+
+
+def process_applicant(payload, decision_engine, verification_service):
+    """
+    Runs cleaning, rules, ID/face verification and fraud scoring for one applicant.
+
+    Args:
+        payload (dict): A payload built by make_job_payload.
+        decision_engine (DecisionEngine): Engine wrapping the trained model.
+        verification_service (VerificationService): Shared verification service.
+
+    Returns:
+        dict: The onboarding decision for the applicant.
+    """
+    applicant = payload["applicant"]
+    df = pd.DataFrame([applicant])
+    processed_df = process_kyc_data(df)
+    if processed_df.empty:
+        return {"CustomerID": applicant.get("CustomerID"), "RuleFlag": "Suspicious",
+                "RuleReason": "Missing mandatory fields", "ML_Prediction": None, "Fraud_Probability": None,
+                "Decision_Tier": None, "ID_Doc_Authenticity_Score": None, "Face_Match_Confidence": None}
+
+    # Hard-rejected applicants (e.g. blacklisted PAN) don't need the Vision API calls
+    if decision_engine.hard_rejected(processed_df).iloc[0]:
+        return _decision_result(applicant, decision_engine.decide(processed_df).iloc[0])
+
+    with open(payload["document_image_path"], "rb") as f:
+        document_bytes = f.read()
+    with open(payload["live_photo_path"], "rb") as f:
+        live_photo_bytes = f.read()
+    verification_results = verification_service.verify(document_bytes, live_photo_bytes)
+
+    processed_df = add_id_verification_features(processed_df, verification_results)
+    return _decision_result(applicant, decision_engine.decide(processed_df).iloc[0])
+
+
+class _LeaseHeartbeat:
+    """Keeps extending a job's lease while it is being processed."""
+
+    def __init__(self, broker, job_id, worker_id, lease_seconds):
+        self.broker = broker
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            if not self.broker.extend_lease(self.job_id, self.worker_id, self.lease_seconds):
+                logger.warning(f"Lost the lease on job {self.job_id}")
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_worker(broker_url=DEFAULT_BROKER_URL, model_path=DEFAULT_MODEL_PATH, worker_id=None,
+               max_jobs=None, stop_event=None, lease_seconds=LEASE_SECONDS, poll_interval=POLL_INTERVAL,
+               metrics_path=None, metrics_labels=None):
+    """
+    Consumes onboarding jobs until stopped.
+
+    The model and verification service are loaded once per worker. Each job is
+    acked with its result on success and nacked for a delayed retry on error.
+
+    Args:
+        broker_url (str): Broker URL or SQLite path (see job_queue.create_broker).
+        model_path (str): Path to the trained model.
+        worker_id (str): Unique worker name; defaults to host:pid.
+        max_jobs (int): Stop after this many jobs (None to run forever).
+        stop_event (threading.Event or multiprocessing.Event): Set to stop the worker.
+        lease_seconds (float): Lease length; renewed by a heartbeat while processing.
+        poll_interval (float): Sleep between polls when the queue is empty.
+        metrics_path (str): If set, the worker's metrics are written here every
+            METRICS_INTERVAL seconds and when it stops.
+        metrics_labels (dict): Labels added to every series in `metrics_path`.
+
+    Returns:
+        int: Number of jobs processed.
+    """
+    # Imported here so the Vision client is created inside the worker process
+    from verification_service import VerificationService
+
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    broker = create_broker(broker_url)
+    decision_engine = DecisionEngine(*load_model(model_path))
+    verification_service = VerificationService()
+    logger.info(f"Worker {worker_id} consuming from {broker_url}")
+
+    processed = 0
+    metrics_written = time.monotonic()
+    while max_jobs is None or processed < max_jobs:
+        if stop_event is not None and stop_event.is_set():
+            break
+        if metrics_path and time.monotonic() - metrics_written >= METRICS_INTERVAL:
+            metrics.write_metrics(metrics_path, const_labels=metrics_labels)
+            metrics_written = time.monotonic()
+        job = broker.claim(worker_id, lease_seconds)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+
+        try:
+            with _LeaseHeartbeat(broker, job.id, worker_id, lease_seconds), \
+                    metrics.timer("kyc_onboarding_job_latency_seconds", help_text="Onboarding job processing time."):
+                result = process_applicant(job.payload, decision_engine, verification_service)
+        except Exception as e:
+            logger.error(f"Job {job.id} failed (attempt {job.attempts}): {e}")
+            metrics.REGISTRY.inc("kyc_onboarding_jobs_total", help_text="Onboarding jobs by outcome.", outcome="failed")
+            broker.nack(job.id, worker_id, e, retry_delay=RETRY_DELAY)
+        else:
+            broker.ack(job.id, worker_id, result)
+            metrics.REGISTRY.inc("kyc_onboarding_jobs_total", help_text="Onboarding jobs by outcome.", outcome="done")
+        processed += 1
+
+    verification_service.close()
+    if metrics_path:
+        metrics.write_metrics(metrics_path, const_labels=metrics_labels)
+    return processed
+
+
+def _worker_process(broker_url, model_path, stop_event, name, metrics_dir, metrics_port):
+    # Ctrl-C reaches the whole process group; only the parent handles it, and
+    # stops the workers through stop_event once their current job is done.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if metrics_port is not None:
+        metrics.start_metrics_server(metrics_port)
+        logger.info(f"Serving {name} metrics on port {metrics_port}")
+    metrics_path = os.path.join(metrics_dir, f"{name}.prom") if metrics_dir else None
+    run_worker(broker_url, model_path, stop_event=stop_event, metrics_path=metrics_path,
+               metrics_labels={"worker": name})
+
+
+def run_worker_pool(broker_url=DEFAULT_BROKER_URL, model_path=DEFAULT_MODEL_PATH, n_workers=None,
+                    metrics_dir=DEFAULT_METRICS_DIR, metrics_port=None):
+    """
+    Runs `n_workers` worker processes against the same broker until interrupted.
+
+    Scale horizontally by running more pools, on this host or on other nodes
+    that share the broker.
+
+    Args:
+        broker_url (str): Broker URL or SQLite path.
+        model_path (str): Path to the trained model.
+        n_workers (int): Number of worker processes; defaults to the CPU count.
+        metrics_dir (str): Each worker writes its metrics to
+            <metrics_dir>/onboarding-worker-<i>.prom, labelled worker="onboarding-worker-<i>".
+            None disables the files.
+        metrics_port (int): If set, worker i also serves its metrics on port metrics_port + i.
+    """
+    n_workers = n_workers or os.cpu_count()
+    stop_event = multiprocessing.Event()
+    workers = []
+    for i in range(n_workers):
+        name = f"onboarding-worker-{i}"
+        port = None if metrics_port is None else metrics_port + i
+        workers.append(multiprocessing.Process(target=_worker_process, name=name,
+                                               args=(broker_url, model_path, stop_event, name, metrics_dir, port)))
+    for worker in workers:
+        worker.start()
+    logger.info(f"Started {n_workers} onboarding workers")
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        logger.info("Stopping workers after their current job...")
+        stop_event.set()
+        for worker in workers:
+            worker.join()
+
+
+def submit_applicants(csv_path, document_image_path, live_photo_path, broker_url=DEFAULT_BROKER_URL):
+    """
+    Enqueues every applicant in a raw KYC CSV, blocking while the queue is full.
+
+    CustomerID is used as the job id, so re-submitting a file doesn't create
+    duplicate jobs.
+
+    Returns:
+        int: Number of applicants submitted.
+    """
+    broker = create_broker(broker_url)
+    df = pd.read_csv(csv_path, dtype=str)
+    for applicant in df.to_dict(orient="records"):
+        applicant["TxnCount"] = int(applicant["TxnCount"])
+        applicant["TxnAmount"] = float(applicant["TxnAmount"])
+        broker.enqueue(make_job_payload(applicant, document_image_path, live_photo_path),
+                       job_id=applicant.get("CustomerID"), block=True)
+    return len(df)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Asynchronous KYC onboarding workers.")
+    parser.add_argument("--broker", default=DEFAULT_BROKER_URL, help="Broker URL or SQLite queue path.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    work = subparsers.add_parser("work", help="Run a pool of worker processes.")
+    work.add_argument("--workers", type=int, default=None)
+    work.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    work.add_argument("--metrics-dir", default=DEFAULT_METRICS_DIR,
+                      help="Directory for the per-worker metrics files (for node_exporter's textfile collector).")
+    work.add_argument("--metrics-port", type=int, default=None,
+                      help="Serve worker i's metrics over HTTP on this port + i.")
+
+    submit = subparsers.add_parser("submit", help="Enqueue the applicants in a raw KYC CSV.")
+    submit.add_argument("csv_path")
+    submit.add_argument("--document", required=True, help="Identity document image for every applicant.")
+    submit.add_argument("--live-photo", required=True, help="Live photo for every applicant.")
+
+    args = parser.parse_args()
+    if args.command == "work":
+        run_worker_pool(args.broker, args.model, args.workers, args.metrics_dir, args.metrics_port)
+    else:
+        count = submit_applicants(args.csv_path, args.document, args.live_photo, args.broker)
+        print(f"Submitted {count} applicants to {args.broker}")
@@ -0,0 +1,223 @@
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+MISSING_FILE = "<missing>"
+
+
+class Stage:
+    """
+    A pipeline stage with declared file inputs and outputs.
+
+    The stage function is called as `func(**params)`. It should read its
+    inputs from disk, write every declared output and may return the number
+    of rows it processed. It should raise on failure rather than write
+    placeholder outputs, or the placeholders are reused by later runs.
+
+    `code` lists the source files the stage runs besides its own function;
+    editing any of them, or the function, makes the stage run again.
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=(), params=None, code=()):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = params or {}
+        self.code = list(code)
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+
+class PipelineRunner:
+    """
+    Runs stages as a DAG, skipping stages whose inputs haven't changed.
+
+    A stage depends on every stage that produces one of its inputs. Each stage
+    is fingerprinted from its name, parameters, code (the stage function's
+    source and the content hashes of its declared code files) and the content
+    hashes of its input files; the fingerprint of each successful run is stored in a JSON
+    state file. On the next run a stage is skipped when its fingerprint
+    matches and its outputs are unchanged, so a failed run resumes from the
+    stage that failed. Independent stages run concurrently in a thread pool.
+    """
+
+    def __init__(self, stages, state_path, max_workers=None, profile_stage=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_path = state_path
+        self.max_workers = max_workers
+        self.profile_stage = profile_stage
+        self._lock = threading.Lock()
+        self._state = self._load_state()
+        self.dependencies = self._resolve_dependencies()
+
+    def _resolve_dependencies(self):
+        producers = {}
+        for stage in self.stages.values():
+            for output in stage.outputs:
+                if output in producers:
+                    raise ValueError(f"Output {output} is produced by both {producers[output]} and {stage.name}")
+                producers[output] = stage.name
+        dependencies = {
+            name: {producers[i] for i in stage.inputs if i in producers and producers[i] != name}
+            for name, stage in self.stages.items()
+        }
+        self._check_acyclic(dependencies)
+        return dependencies
+
+    @staticmethod
+    def _check_acyclic(dependencies):
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline has a dependency cycle through stage {name}")
+            visiting.add(name)
+            for dependency in dependencies[name]:
+                visit(dependency)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in dependencies:
+            visit(name)
+
+    def _load_state(self):
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path) as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                logger.warning(f"Ignoring unreadable pipeline state file {self.state_path}")
+        return {"stages": {}, "file_hashes": {}}
+
+    def _save_state(self):
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def file_hash(self, path):
+        """Content hash of a file, cached by (size, mtime) in the state file."""
+        if not os.path.exists(path):
+            return MISSING_FILE
+        stat = os.stat(path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        with self._lock:
+            cached = self._state["file_hashes"].get(path)
+        if cached and cached["signature"] == signature:
+            return cached["sha256"]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        with self._lock:
+            self._state["file_hashes"][path] = {"signature": signature, "sha256": digest.hexdigest()}
+        return digest.hexdigest()
+
+    @staticmethod
+    def _function_hash(func):
+        try:
+            source = inspect.getsource(func)
+        except (OSError, TypeError):
+            source = f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', repr(func))}"
+        return hashlib.sha256(source.encode()).hexdigest()
+
+    def fingerprint(self, stage):
+        """Fingerprint of a stage's parameters, code and input file contents."""
+        payload = {
+            "stage": stage.name,
+            "params": stage.params,
+            "code": {"function": self._function_hash(stage.func),
+                     "files": {path: self.file_hash(path) for path in stage.code}},
+            "inputs": {path: self.file_hash(path) for path in stage.inputs},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _is_up_to_date(self, stage, fingerprint):
+        with self._lock:
+            previous = self._state["stages"].get(stage.name)
+        if not previous or previous.get("fingerprint") != fingerprint:
+            return False
+        return all(self.file_hash(path) == previous["outputs"].get(path) for path in stage.outputs)
+
+    def _run_stage(self, stage, force):
+        fingerprint = self.fingerprint(stage)
+        if not force and self._is_up_to_date(stage, fingerprint):
+            logger.info(f"Skipping stage '{stage.name}': inputs unchanged since the last successful run")
+            metrics.REGISTRY.inc("kyc_stage_skipped_total", help_text="Stages skipped as up to date.",
+                                 stage=stage.name)
+            return "skipped"
+
+        logger.info(f"Running stage '{stage.name}'...")
+        with metrics.stage_timer(stage.name, profile_stage=self.profile_stage) as info:
+            info["rows"] = stage.func(**stage.params)
+
+        outputs = {path: self.file_hash(path) for path in stage.outputs}
+        missing = [path for path, digest in outputs.items() if digest == MISSING_FILE]
+        if missing:
+            raise RuntimeError(f"Stage '{stage.name}' did not write its outputs: {missing}")
+        with self._lock:
+            self._state["stages"][stage.name] = {
+                "fingerprint": fingerprint,
+                "outputs": outputs,
+                "completed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+            self._save_state()
+        return "completed"
+
+    def run(self, force=False):
+        """
+        Runs all stages in dependency order.
+
+        Args:
+            force (bool): Re-run every stage even if it is up to date.
+
+        Returns:
+            dict: Stage name -> "completed", "skipped", "failed" or "blocked".
+        """
+        status = {}
+        pending = dict(self.dependencies)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                for name in list(pending):
+                    dependencies = pending[name]
+                    if any(status.get(d) in ("failed", "blocked") for d in dependencies):
+                        logger.warning(f"Stage '{name}' blocked by a failed upstream stage")
+                        status[name] = "blocked"
+                        del pending[name]
+                    elif all(status.get(d) in ("completed", "skipped") for d in dependencies):
+                        running[executor.submit(self._run_stage, self.stages[name], force)] = name
+                        del pending[name]
+                if not running:
+                    continue
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        status[name] = future.result()
+                    except Exception as e:
+                        logger.error(f"Stage '{name}' failed: {e}")
+                        status[name] = "failed"
+
+        with self._lock:
+            self._save_state()
+        return status
@@ -0,0 +1,88 @@
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = "string[pyarrow]"
+except ImportError:  # pyarrow is optional; fall back to pandas' own string dtype
+    STRING_DTYPE = "string"
+
+# Free-text and identifier columns, stored as Arrow-backed strings. Aadhaar and
+# Mobile stay strings too: their exact text (spaces, leading zeros) is what the
+# format and blacklist rules check, so it must survive a CSV round trip.
+TEXT_COLUMNS = ["CustomerID", "Name", "DOB", "PAN", "Aadhaar", "Email", "Mobile", "Address"]
+
+# Low-cardinality labels with a fixed set of values
+FLAG_CATEGORIES = {
+    "RuleFlag": ["Valid", "Suspicious"],
+    "ML_Prediction": ["Valid", "Fraud"],
+    "Decision_Tier": ["hard_rule", "cheap_rule", "model"],
+}
+
+# Columns whose values repeat heavily across rows
+CATEGORY_COLUMNS = ["RuleReason"]
+
+# 0/1 indicator columns
+BINARY_COLUMNS = ["OCR_Name_Mismatch_Flag", "OCR_DOB_Mismatch_Flag"]
+
+# Scores in [0, 1]; float32 keeps ~7 significant digits, plenty for a probability
+SCORE_COLUMNS = ["ID_Doc_Authenticity_Score", "Liveness_Score", "Face_Match_Confidence", "Fraud_Probability"]
+
+# Bitmask of the rules each record tripped (see data_processor.RULE_BITS)
+RULE_HITS_COLUMN = "RuleHits"
+
+# Counts are downcast to the narrowest unsigned type that fits the data.
+# TxnAmount stays float64 so rupee amounts keep exact paise.
+COUNT_COLUMNS = ["TxnCount"]
+
+# Compact dtypes that can be applied while parsing a CSV. Counts are left out:
+# their narrowest type depends on the data, so to_compact downcasts them after.
+COMPACT_DTYPES = {
+    **{col: STRING_DTYPE for col in TEXT_COLUMNS},
+    **{col: pd.CategoricalDtype(categories) for col, categories in FLAG_CATEGORIES.items()},
+    **{col: "category" for col in CATEGORY_COLUMNS},
+    **{col: "uint8" for col in BINARY_COLUMNS},
+    **{col: "float32" for col in SCORE_COLUMNS},
+    RULE_HITS_COLUMN: "uint16",
+}
+
+
+def to_compact(df):
+    """
+    Convert a processed KYC DataFrame to its memory-compact representation.
+
+    Text and identifiers become Arrow-backed strings, flags and reasons
+    become categoricals, indicators become uint8 and scores float32. Columns
+    that are absent are ignored, so this can be applied at any point after
+    rule-based detection. Columns already in their compact dtype (e.g. read
+    with COMPACT_DTYPES) are left as they are, and `df` itself isn't modified.
+
+    Args:
+        df (pd.DataFrame): The processed KYC data.
+
+    Returns:
+        pd.DataFrame: The same data using compact dtypes.
+    """
+    # A shallow copy: columns are replaced below, never written into, so the
+    # caller's frame is untouched without duplicating the data.
+    df = df.copy(deep=False)
+    for col in TEXT_COLUMNS + list(FLAG_CATEGORIES) + BINARY_COLUMNS + SCORE_COLUMNS + [RULE_HITS_COLUMN]:
+        if col in df.columns and df[col].dtype != COMPACT_DTYPES[col]:
+            df[col] = df[col].astype(COMPACT_DTYPES[col])
+    for col in CATEGORY_COLUMNS:
+        if col not in df.columns:
+            continue
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].fillna("").astype(str).astype("category")
+        elif df[col].hasnans:
+            if "" not in df[col].cat.categories:
+                df[col] = df[col].cat.add_categories("")
+            df[col] = df[col].fillna("")
+    for col in COUNT_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], downcast="unsigned")
+    return df
+
+
+def memory_usage_mb(df):
+    """Deep memory usage of a DataFrame in MB."""
+    return df.memory_usage(deep=True).sum() / 2**20
@@ -0,0 +1,58 @@
+import argparse
+import json
+import os
+import sys
+
+from compiled_model import load_compiled_model
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_COMPILED_MODEL_PATH = os.path.join(ROOT_DIR, 'models', 'fraud_detection_model.npz')
+
+# Lines scored per model call
+BATCH_SIZE = 1000
+
+
+def score_records(model, records):
+    """
+    Scores raw applicant records with the compiled model.
+
+    Only the model score is computed; the rule tiers of the full pipeline
+    (see decision_engine) are not applied.
+
+    Args:
+        model (CompiledModel): The compiled fraud model.
+        records (list): Applicant dicts with TxnCount, TxnAmount, PAN and Email.
+
+    Returns:
+        list: One {"CustomerID", "Fraud_Probability", "ML_Prediction"} dict per record.
+    """
+    if not records:
+        return []
+    probabilities = model.fraud_probability(model.features_from_records(records))
+    return [{"CustomerID": record.get("CustomerID"),
+             "Fraud_Probability": float(probability),
+             "ML_Prediction": "Fraud" if probability > 0.5 else "Valid"}
+            for record, probability in zip(records, probabilities)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Score applicants read as JSON lines from stdin; results are written as JSON lines.")
+    parser.add_argument("--model", default=DEFAULT_COMPILED_MODEL_PATH, help="Compiled model (.npz).")
+    args = parser.parse_args(argv)
+
+    model = load_compiled_model(args.model)
+    batch = []
+    for line in sys.stdin:
+        if line.strip():
+            batch.append(json.loads(line))
+        if len(batch) >= BATCH_SIZE:
+            for result in score_records(model, batch):
+                print(json.dumps(result))
+            batch = []
+    for result in score_records(model, batch):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from id_document_processor import IDDocumentProcessor, is_ocr_error
+from face_verifier import FaceVerifier
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class VerificationService:
+    """
+    Thread-safe identity verification for in-memory uploads.
+
+    One service instance is meant to be shared by every caller (e.g. all
+    dashboard sessions). It holds one Vision client. For each request it runs
+    the document OCR and both face detections concurrently, and it
+    de-duplicates identical uploads: a repeated request is served from an LRU
+    cache, and a request identical to one still in progress waits for that
+    result instead of calling the Vision API again. Results whose OCR failed
+    are not cached, so a transient Vision error is retried on the next request.
+    """
+
+    def __init__(self, id_processor=None, face_verifier=None, max_workers=8, cache_size=256):
+        self.face_verifier = face_verifier or FaceVerifier()
+        self.id_processor = id_processor or IDDocumentProcessor(client=self.face_verifier.client)
+        self.cache_size = cache_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="verification")
+        self._lock = threading.Lock()
+        self._results = OrderedDict()
+        self._in_flight = {}
+
+    @staticmethod
+    def request_key(document_bytes, live_photo_bytes):
+        """Content key identifying a (document, live photo) pair."""
+        return (hashlib.sha256(document_bytes).hexdigest(), hashlib.sha256(live_photo_bytes).hexdigest())
+
+    def verify(self, document_bytes, live_photo_bytes):
+        """
+        Verifies an identity document against a live photo.
+
+        Args:
+            document_bytes (bytes): The uploaded identity document image.
+            live_photo_bytes (bytes): The uploaded live photo / selfie.
+
+        Returns:
+            dict: authenticity_score, extracted_data, face_match_confidence and
+            faces_detected (False if a face was missing in either image).
+        """
+        key = self.request_key(document_bytes, live_photo_bytes)
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                metrics.record_cache_access("verification", hit=True)
+                return dict(self._results[key])
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                in_flight = self._in_flight[key] = Future()
+                owner = True
+            else:
+                owner = False
+        metrics.record_cache_access("verification", hit=not owner)
+
+        if not owner:
+            return dict(in_flight.result())
+
+        try:
+            result = self._verify(document_bytes, live_photo_bytes)
+        except Exception as e:
+            with self._lock:
+                del self._in_flight[key]
+            in_flight.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._in_flight[key]
+            if not is_ocr_error(result["extracted_data"]):
+                self._results[key] = result
+                while len(self._results) > self.cache_size:
+                    self._results.popitem(last=False)
+        in_flight.set_result(result)
+        return dict(result)
+
+    def _verify(self, document_bytes, live_photo_bytes):
+        with metrics.timer("kyc_verification_latency_seconds", help_text="End-to-end identity verification latency."):
+            doc_future = self._executor.submit(self.id_processor.process_document_content, document_bytes,
+                                               "<uploaded document>")
+            doc_face_future = self._executor.submit(self.face_verifier.detect_face_content, document_bytes,
+                                                    "<uploaded document>")
+            live_face_future = self._executor.submit(self.face_verifier.detect_face_content, live_photo_bytes,
+                                                     "<uploaded live photo>")
+            doc_result = doc_future.result()
+            doc_face_annotation = doc_face_future.result()
+            live_photo_face_annotation = live_face_future.result()
+
+        faces_detected = doc_face_annotation is not None and live_photo_face_annotation is not None
+        face_match_confidence = 0.0
+        if faces_detected:
+            face_match_confidence = self.face_verifier.match_faces(doc_face_annotation, live_photo_face_annotation)
+        return {
+            "authenticity_score": doc_result["authenticity_score"],
+            "extracted_data": doc_result["extracted_data"],
+            "face_match_confidence": face_match_confidence,
+            "faces_detected": faces_detected,
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
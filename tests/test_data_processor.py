@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+
+from data_generator import generate_synthetic_kyc_data
+from data_processor import apply_rule_based_detection, load_kyc_csv, process_kyc_data
+from schema import COMPACT_DTYPES
+
+
+@pytest.fixture
+def processed_path(tmp_path):
+    df = generate_synthetic_kyc_data(n_records=20)
+    edge_cases = df.head(4).copy()
+    edge_cases["CustomerID"] = [f"edge-{i}" for i in range(4)]
+    edge_cases["Aadhaar"] = ["1234 5678 901", "0123 4567 8901", "123456789012", "1234 5678 9012"]
+    edge_cases["Mobile"] = ["12345", "0987654321", "9876543210", "6000000001"]
+    df_processed = process_kyc_data(pd.concat([df, edge_cases], ignore_index=True))
+    path = tmp_path / "processed.csv"
+    df_processed.to_csv(path, index=False)
+    return path, df_processed
+
+
+@pytest.mark.parametrize("col", ["Aadhaar", "Mobile", "RuleFlag", "RuleReason", "RuleHits"])
+def test_csv_round_trip_keeps_identifiers_and_rule_results(processed_path, col):
+    path, df_processed = processed_path
+    reloaded = load_kyc_csv(path, compact=True)
+    rechecked = apply_rule_based_detection(reloaded.drop(columns=["RuleFlag", "RuleReason"]))
+
+    expected = df_processed[col].astype(str).tolist()
+    assert reloaded[col].astype(str).tolist() == expected
+    assert rechecked[col].astype(str).tolist() == expected
+
+
+def test_compact_load_parses_into_compact_dtypes(processed_path):
+    path, df_processed = processed_path
+    reloaded = load_kyc_csv(path, compact=True)
+
+    for col, dtype in COMPACT_DTYPES.items():
+        if col in reloaded.columns:
+            assert reloaded[col].dtype == dtype, col
+    assert reloaded.dtypes.equals(df_processed.dtypes)